@@ -0,0 +1,424 @@
+"""
+Benchmarks of the sciopy acquisition, conversion and file format hot paths.
+
+Runs without hardware: the byte streams are generated by the SimulatedDevice or read from a recorded raw byte stream
+(all bytes received from the device after the start command, starting with its acknowledgement).
+
+Usage:
+    python benchmarks/bench_sciopy.py                        run all benchmarks, compare with baselines.json
+    python benchmarks/bench_sciopy.py --save-baseline        store the results as new baselines
+    python benchmarks/bench_sciopy.py --n-el 16 32 --only parser legacy
+    python benchmarks/bench_sciopy.py --stream recorded.bin --n-el 32
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sciopy import EIT_16_32_64_128, EitMeasurementSetup
+from sciopy.com_util import (
+    reshape_full_message_in_bursts,
+    reshape_full_message_in_bursts_uint8,
+    split_bursts_in_frames,
+    split_bursts_in_frames_uint8,
+)
+from sciopy.datatype_conversion import (
+    bytesarray_to_float,
+    bytesarray_to_int,
+    byteintarray_to_float,
+    del_hex_in_list,
+    four_byte_to_int,
+    single_hex_to_int,
+    two_byte_to_int,
+)
+from sciopy.doteit import doteit_in_SingleEitFrame, header_keys
+from sciopy.simulation import SimulatedDevice
+from sciopy.usb_message_parser import (
+    MessageParser,
+    load_eit_frames,
+    save_data_frame,
+)
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baselines.json"
+)
+ACK = bytes([0x18, 0x01, 0x83, 0x18])
+MSG_LEN = 140
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# -------------------------------------------------------------------------------------------------------------------- #
+def make_setup(n_el: int, iFrames: int) -> EitMeasurementSetup:
+    return EitMeasurementSetup(
+        burst_count=iFrames,
+        n_el=n_el,
+        exc_freq=10000,
+        framerate=10,
+        amplitude=0.01,
+        inj_skip=0,
+        gain=1,
+        adc_range=1,
+    )
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def make_stream(n_el: int, iFrames: int, seed: int = 0) -> bytes:
+    """
+    Synthetic byte stream of one measurement: acknowledgement of the start command followed by iFrames frames.
+    """
+    cDevice = SimulatedDevice(
+        n_el=n_el, burst_count=iFrames, realtime=False, timeout=0, seed=seed
+    )
+    cDevice.write(bytes([0xB4, 0x01, 0x01, 0xB4]))
+    return cDevice.read(1 << 31)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def load_stream(sPath: str, n_el: int):
+    """
+    Recorded byte stream, the number of frames follows from the number of data messages.
+    """
+    with open(sPath, "rb") as f:
+        bStream = f.read()
+    iMessages = (len(bStream) - len(ACK)) // MSG_LEN
+    iFrames = iMessages // (n_el * (n_el // 16))
+    return bStream, iFrames
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def timeit(fFunction, iRepeat: int):
+    """
+    Returns:
+        Best time of iRepeat runs in seconds and the result of the last run
+    """
+    fBest = np.inf
+    result = None
+    for _ in range(iRepeat):
+        fStart = time.perf_counter()
+        result = fFunction()
+        fBest = min(fBest, time.perf_counter() - fStart)
+    return fBest, result
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# -------------------------------------------------------------------------------------------------------------------- #
+def bench_parser(n_el, iFrames, bStream, iRepeat):
+    """
+    MessageParser.parse_buffer with the byte_parser generator and interpret_message, and with the chunk decoder.
+    """
+    dResults = {}
+    setup = make_setup(n_el, iFrames)
+    for sEngine in ["byte", "chunk"]:
+        cParser = MessageParser(None, devicetype="FS", engine=sEngine)
+        cParser.bPrintMessages = False
+
+        def run():
+            cParser.set_measurement_setup(setup)
+            cParser.init_parser()
+            cParser.parse_buffer(bStream + ACK)
+            return len(cParser.ppcData)
+
+        fTime, iParsed = timeit(run, iRepeat)
+        assert iParsed == iFrames, f"{sEngine}: {iParsed} of {iFrames} frames parsed"
+        dResults[f"parser_{sEngine}"] = (iFrames / fTime, len(bStream) / fTime)
+    return dResults
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def bench_legacy(n_el, iFrames, bStream, iRepeat):
+    """
+    Legacy chain del_hex_in_list -> reshape_full_message_in_bursts -> split_bursts_in_frames -> get_data_as_matrix,
+    the same chain on uint8 arrays and the direct conversion of the uint8 bursts into the potential matrix.
+    """
+    setup = make_setup(n_el, iFrames)
+    psHex = [hex(b) for b in bStream]
+    cEIT = EIT_16_32_64_128(n_el)
+    cEIT.setup = setup
+
+    def run():
+        data = del_hex_in_list(psHex)
+        data = reshape_full_message_in_bursts(data, setup)
+        cEIT.data = split_bursts_in_frames(data, iFrames, cEIT.channel_group)
+        return cEIT.get_data_as_matrix()
+
+    def run_uint8():
+        data = reshape_full_message_in_bursts_uint8(bStream, setup)
+        cEIT.data = split_bursts_in_frames_uint8(data, iFrames, cEIT.channel_group)
+        return cEIT.get_data_as_matrix()
+
+    def run_uint8_matrix():
+        cEIT.data = reshape_full_message_in_bursts_uint8(bStream, setup)
+        return cEIT.get_data_as_matrix()
+
+    dResults = {}
+    for sName, fRun in [
+        ("legacy_chain", run),
+        ("legacy_uint8_chain", run_uint8),
+        ("legacy_uint8_matrix", run_uint8_matrix),
+    ]:
+        fTime, pcMatrix = timeit(fRun, iRepeat)
+        assert pcMatrix.shape == (iFrames, n_el, n_el)
+        dResults[sName] = (iFrames / fTime, len(bStream) / fTime)
+    return dResults
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def bench_conversion(n_el, iFrames, bStream, iRepeat):
+    """
+    datatype_conversion helpers, applied to all fields of all data messages of the stream.
+    """
+    pMessages = np.frombuffer(
+        bStream,
+        dtype=np.uint8,
+        count=(len(bStream) - len(ACK)) // MSG_LEN * MSG_LEN,
+        offset=len(ACK),
+    ).reshape(-1, MSG_LEN)
+    piFloats = pMessages[:, 11:139].reshape(-1, 4).tolist()
+    psFloats = [[format(b, "x") for b in f] for f in piFloats]
+    piTimestamps = pMessages[:, 7:11].tolist()
+    psTimestamps = [[format(b, "x") for b in t] for t in piTimestamps]
+    piFreqRows = pMessages[:, 5:7].tolist()
+    psExcitation = [format(b, "x") for b in pMessages[:, 3:5].ravel()]
+    psHex = [hex(b) for b in bStream]
+
+    dCases = {
+        "del_hex_in_list": (lambda: del_hex_in_list(psHex), len(bStream)),
+        "bytesarray_to_float": (
+            lambda: [bytesarray_to_float(f) for f in psFloats],
+            4 * len(psFloats),
+        ),
+        "byteintarray_to_float": (
+            lambda: [byteintarray_to_float(f) for f in piFloats],
+            4 * len(piFloats),
+        ),
+        "bytesarray_to_int": (
+            lambda: [bytesarray_to_int(t) for t in psTimestamps],
+            4 * len(psTimestamps),
+        ),
+        "four_byte_to_int": (
+            lambda: [four_byte_to_int(t) for t in piTimestamps],
+            4 * len(piTimestamps),
+        ),
+        "two_byte_to_int": (
+            lambda: [two_byte_to_int(r) for r in piFreqRows],
+            2 * len(piFreqRows),
+        ),
+        "single_hex_to_int": (
+            lambda: [single_hex_to_int(e) for e in psExcitation],
+            len(psExcitation),
+        ),
+    }
+    dResults = {}
+    for sName, (fFunction, iBytes) in dCases.items():
+        fTime, _ = timeit(fFunction, iRepeat)
+        dResults[f"conversion_{sName}"] = (iFrames / fTime, iBytes / fTime)
+    return dResults
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def make_doteit_content(n_el: int, seed: int = 0) -> list:
+    """
+    Lines of a synthetic .eit file with one frame of adjacent injections.
+    """
+    rng = np.random.default_rng(seed)
+    psLines = ["18", "2", "bench", "2025.01.01. 00:00:00.000"]
+    psLines += ["10000", "10000", "0", "1", "0.01", "10", "0", "0", "0", "0", "0", "0"]
+    psLines += [str(n_el), "1"]
+    assert len(psLines) == len(header_keys)
+    for i in range(n_el):
+        psLines.append(f"{i + 1} {(i + 1) % n_el + 1}")
+        psLines.append("\t".join(f"{v:.6E}" for v in rng.normal(size=2 * n_el)))
+    psLines.append("")
+    return psLines
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def bench_doteit(n_el, iFrames, bStream, iRepeat):
+    """
+    doteit_in_SingleEitFrame, one .eit file per frame.
+    """
+    psLines = make_doteit_content(n_el)
+    iBytes = len("\n".join(psLines))
+
+    def run():
+        for _ in range(iFrames):
+            doteit_in_SingleEitFrame(psLines)
+
+    fTime, _ = timeit(run, iRepeat)
+    return {"doteit_in_SingleEitFrame": (iFrames / fTime, iFrames * iBytes / fTime)}
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def bench_files(n_el, iFrames, bStream, iRepeat):
+    """
+    save_data_frame/load_eit_frames for npz files and the recording file format.
+    """
+    setup = make_setup(n_el, iFrames)
+    cParser = MessageParser(None, devicetype="FS", engine="chunk")
+    cParser.set_measurement_setup(setup)
+    cParser.init_parser()
+    cParser.parse_buffer(bStream + ACK)
+    frames = list(cParser.ppcData)
+    iBytes = iFrames * frames[0].ppcData.nbytes
+
+    dResults = {}
+    with tempfile.TemporaryDirectory() as sTmp:
+        for sFormat in ["npz", "recording"]:
+            sPath = os.path.join(sTmp, sFormat) + os.sep
+
+            def save():
+                if os.path.isdir(sPath):
+                    for f in os.listdir(sPath):
+                        os.remove(os.path.join(sPath, f))
+                os.makedirs(sPath, exist_ok=True)
+                for i, frame in enumerate(frames):
+                    if sFormat == "npz":
+                        save_data_frame(sPath, frame, i)
+                    else:
+                        cParser.save_frame(frame, "recording", sPath, i)
+                cParser.close_recording()
+
+            sLoadPath = sPath
+            fTime, _ = timeit(save, iRepeat)
+            dResults[f"save_{sFormat}"] = (iFrames / fTime, iBytes / fTime)
+            if sFormat == "recording":
+                sLoadPath = os.path.join(sPath, os.listdir(sPath)[0])
+
+            def load():
+                loaded = load_eit_frames(sLoadPath)
+                pcData = np.array([frame.ppcData for frame in loaded])
+                if hasattr(loaded, "close"):
+                    loaded.close()
+                return pcData
+
+            fTime, pcData = timeit(load, iRepeat)
+            assert pcData.shape[0] == iFrames
+            dResults[f"load_{sFormat}"] = (iFrames / fTime, iBytes / fTime)
+    return dResults
+
+
+BENCHMARKS = {
+    "parser": bench_parser,
+    "legacy": bench_legacy,
+    "conversion": bench_conversion,
+    "doteit": bench_doteit,
+    "files": bench_files,
+}
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# -------------------------------------------------------------------------------------------------------------------- #
+def run_benchmarks(piNEl, iFrames, psOnly, iRepeat, sStream=None):
+    """
+    Returns:
+        Dictionary {"<benchmark>/<n_el>": {"frames_per_s": float, "mb_per_s": float}}
+    """
+    dResults = {}
+    for n_el in piNEl:
+        if sStream is not None:
+            bStream, iStreamFrames = load_stream(sStream, n_el)
+        else:
+            iStreamFrames = iFrames
+            bStream = make_stream(n_el, iFrames)
+        bStream = bStream[: len(ACK) + iStreamFrames * n_el * (n_el // 16) * MSG_LEN]
+        for sGroup in psOnly:
+            with open(os.devnull, "w") as fNull:
+                # The legacy functions print their progress
+                stdout, sys.stdout = sys.stdout, fNull
+                try:
+                    dGroup = BENCHMARKS[sGroup](n_el, iStreamFrames, bStream, iRepeat)
+                finally:
+                    sys.stdout = stdout
+            for sName, (fFrames, fBytes) in dGroup.items():
+                dResults[f"{sName}/{n_el}"] = {
+                    "frames_per_s": fFrames,
+                    "mb_per_s": fBytes / 1e6,
+                }
+                print(
+                    f"{sName + '/' + str(n_el):<40} {fFrames:>12.2f} frames/s {fBytes / 1e6:>10.3f} MB/s"
+                )
+    return dResults
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def compare_with_baselines(dResults, dBaselines, fTolerance):
+    """
+    Prints the ratio of the results to the baselines.
+    Returns:
+        List of the benchmarks slower than (1 - fTolerance) * baseline
+    """
+    psRegressions = []
+    print(f"\n{'benchmark':<40} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for sKey, dResult in dResults.items():
+        if sKey not in dBaselines:
+            continue
+        fBase = dBaselines[sKey]["frames_per_s"]
+        fRatio = dResult["frames_per_s"] / fBase
+        sFlag = ""
+        if fRatio < 1 - fTolerance:
+            sFlag = "  REGRESSION"
+            psRegressions.append(sKey)
+        print(
+            f"{sKey:<40} {fBase:>12.2f} {dResult['frames_per_s']:>12.2f} {fRatio:>8.2f}{sFlag}"
+        )
+    return psRegressions
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--n-el", type=int, nargs="+", default=[16, 32, 64, 128])
+    parser.add_argument(
+        "--frames", type=int, default=10, help="frames per synthetic stream"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="runs per benchmark, the best is reported"
+    )
+    parser.add_argument(
+        "--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS)
+    )
+    parser.add_argument(
+        "--stream", help="recorded raw byte stream instead of the synthetic one"
+    )
+    parser.add_argument("--baselines", default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="store the results as baselines"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slowdown before a regression is reported",
+    )
+    args = parser.parse_args()
+
+    dResults = run_benchmarks(
+        args.n_el, args.frames, args.only, args.repeat, args.stream
+    )
+
+    dBaselines = {}
+    if os.path.isfile(args.baselines):
+        with open(args.baselines, "r") as f:
+            dBaselines = json.load(f)
+    if args.save_baseline:
+        dBaselines.update(dResults)
+        with open(args.baselines, "w") as f:
+            json.dump(dBaselines, f, indent=2, sort_keys=True)
+        print(f"\nBaselines saved to {args.baselines}")
+        return 0
+    psRegressions = compare_with_baselines(dResults, dBaselines, args.tolerance)
+    if psRegressions:
+        print(f"\n{len(psRegressions)} regression(s): {', '.join(psRegressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
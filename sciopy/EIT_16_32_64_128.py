@@ -9,10 +9,13 @@ from .com_util import (
     clTbt_dp,
     clTbt_sp,
     del_hex_in_list,
+    potential_matrix,
+    bursts_to_potential_matrix,
     reshape_full_message_in_bursts,
     split_bursts_in_frames,
 )
 
+from operator import attrgetter
 import numpy as np
 from pyftdi.ftdi import Ftdi
 
@@ -28,21 +31,60 @@ msg_dict = {
     "0x92": "Data holdup: Measurement data could not be sent via the master interface",
 }
 
-from .sciopy_dataclasses import EitMeasurementSetup
-from sciopydev.sciopy.usb_message_parser import (
+from .sciopy_dataclasses import EitMeasurementSetup, CompactSingleFrame
+from .usb_message_parser import (
     MessageParser,
+    ACK_OK,
     make_eitframes_hex,
     get_data_as_matrix,
     make_results_folder,
 )
 
 
+def changed_setup_commands(device_state, commands):
+    """
+    Reduces a setup command sequence to the commands whose parameters differ from a device state.
+
+    The excitation sequence can only be cleared by resetting the measurement setup, so if any injection command
+    changed (or the device state is unknown), the full sequence including the reset is returned.
+
+    Parameters
+    ----------
+    device_state : dict or None
+        {name: command} of the applied setup, None if unknown.
+    commands : list
+        List of (name, bytearray) tuples, see EIT_16_32_64_128.make_setup_commands.
+
+    Returns
+    -------
+    list
+        List of (name, bytearray) tuples to be sent.
+    """
+    if device_state is None:
+        return commands
+    injections = [
+        (name, bytes(cmd)) for name, cmd in commands if name.startswith("Injection")
+    ]
+    cached_injections = [
+        (name, cmd)
+        for name, cmd in device_state.items()
+        if name.startswith("Injection")
+    ]
+    if injections != cached_injections:
+        return commands
+    return [
+        (name, cmd)
+        for name, cmd in commands
+        if name != "Reset measurement setup" and device_state.get(name) != bytes(cmd)
+    ]
+
+
 class EIT_16_32_64_128:
     """
     A class for interfacing with the Sciospec EIT 16/32/64/128 devices.
     """
 
-    def __init__(self, n_el: int) -> None:
+    def __init__(self, n_el: int, dtype=np.complex64) -> None:
         """
         __init__
 
@@ -50,10 +92,16 @@ class EIT_16_32_64_128:
         ----------
         n_el : int
             number of electrodes used for measurement.
+        dtype : np.dtype
+            complex data type of the received EIT frames. The device sends single precision floats, so the default
+            complex64 keeps the native precision.
         """
         self.n_el = n_el
+        self.dtype = dtype
         self.channel_group = self.init_channel_group()
         self.print_msg = True
+        # Commands of the last applied setup {name: command}, None if the device state is unknown
+        self.device_state = None
         self.ret_hex_int = None
         self.cMessageParser = None
         self.setup = None
@@ -78,7 +126,18 @@ class EIT_16_32_64_128:
                 f"Unallowed value: {self.n_el}. Please set 16, 32, 48 or 64 electrode mode."
             )
 
-    def connect_device_HS(self, url: str = "ftdi://ftdi:232h/1", baudrate: int = 9000):
+    def connect_device_HS(
+        self,
+        url: str = "ftdi://ftdi:232h/1",
+        baudrate: int = 9000,
+        parser_engine: str = "byte",
+        latency_timer: int = 2,
+        read_chunksize: int = 0,
+        write_chunksize: int = 0,
+        read_size: int = 1024,
+        max_read_size: int = 65536,
+        read_attempts: int = 150,
+    ):
         """
         Establishes a high-speed serial connection to an FTDI device.
 
@@ -89,6 +148,20 @@ class EIT_16_32_64_128:
         Args:
             url (str): The FTDI device URL. Defaults to "ftdi://ftdi:232h/1".
             baudrate (int): The baud rate for the serial connection. Defaults to 9000.
+            parser_engine (str): "byte" parses the received data byte by byte, "chunk" decodes whole read buffers at
+                once. Defaults to "byte".
+            latency_timer (int): FTDI latency timer in ms (1-255), time after which a partly filled USB packet is
+                sent to the host. Short times keep command responses fast. None keeps the device setting.
+                Defaults to 2.
+            read_chunksize (int): USB read transfer size of pyftdi in bytes, 0 selects the pyftdi default.
+                Defaults to 0.
+            write_chunksize (int): USB write transfer size of pyftdi in bytes, 0 selects the pyftdi default.
+                Defaults to 0.
+            read_size (int): Minimal number of bytes requested per read. Defaults to 1024.
+            max_read_size (int): The requested size doubles with every completely filled read up to max_read_size,
+                so high framerate streams are drained in large transfers. Set it to read_size for a fixed size.
+                Defaults to 65536.
+            read_attempts (int): Number of empty USB reads after which a read returns. Defaults to 150.
 
         Side Effects:
             Sets the `self.serial_protocol` attribute to "HS" if not already defined.
@@ -112,10 +185,31 @@ class EIT_16_32_64_128:
         serial.SET_BITS_HIGH
         serial.STOP_BIT_1
         serial.set_baudrate(baudrate)
+        if latency_timer is not None:
+            serial.set_latency_timer(latency_timer)
+        serial.read_data_set_chunksize(read_chunksize)
+        serial.write_data_set_chunksize(write_chunksize)
         self.device = serial
-        self.cMessageParser = MessageParser(self.device, devicetype="HS")
+        self.device_state = None
+        self.cMessageParser = MessageParser(
+            self.device,
+            devicetype="HS",
+            engine=parser_engine,
+            dtype=self.dtype,
+            hs_read_size=read_size,
+            hs_max_read_size=max_read_size,
+            hs_read_attempts=read_attempts,
+        )
 
-    def connect_device_FS(self, port: str, baudrate: int = 9600, timeout: int = 1):
+    def connect_device_FS(
+        self,
+        port: str,
+        baudrate: int = 9600,
+        timeout: int = 1,
+        parser_engine: str = "byte",
+        bulk_read: bool = False,
+        block_size: int = 4096,
+    ):
         """
         Establishes a serial connection to a device using the FS protocol.
 
@@ -123,6 +217,11 @@ class EIT_16_32_64_128:
             port (str): The serial port to connect to (e.g., 'COM3' or '/dev/ttyUSB0').
             baudrate (int, optional): The baud rate for the serial connection. Defaults to 9600.
             timeout (int, optional): The timeout value for the serial connection in seconds. Defaults to 1.
+            parser_engine (str, optional): "byte" parses the received data byte by byte, "chunk" decodes whole read
+                buffers at once. Defaults to "byte".
+            bulk_read (bool, optional): If True, every read returns all bytes waiting in the input buffer instead of a
+                single byte. Defaults to False.
+            block_size (int, optional): Maximal number of bytes returned by one bulk read. Defaults to 4096.
 
         Notes:
             - If a serial connection is already defined in 'self.serial_protocol', a message is printed.
@@ -146,7 +245,58 @@ class EIT_16_32_64_128:
         )
 
         print("Connection to", self.device.name, "is established.")
-        self.cMessageParser = MessageParser(self.device, devicetype="FS")
+        self.device_state = None
+        self.cMessageParser = MessageParser(
+            self.device,
+            devicetype="FS",
+            engine=parser_engine,
+            bulk_read=bulk_read,
+            block_size=block_size,
+            dtype=self.dtype,
+        )
+
+    def connect_device_simulated(
+        self,
+        device=None,
+        protocol: str = "FS",
+        parser_engine: str = "byte",
+        bulk_read: bool = False,
+        block_size: int = 4096,
+        read_size: int = 1024,
+        max_read_size: int = 65536,
+    ):
+        """
+        Connects a simulated device instead of the hardware, for tests and benchmarks without a device.
+
+        Parameters:
+            device (SimulatedDevice, optional): Simulated device to be used. Defaults to a SimulatedDevice with the
+                number of electrodes of this instance.
+            protocol (str, optional): "FS" uses the serial read/write interface, "HS" the FTDI
+                read_data_bytes/write_data interface. Defaults to "FS".
+            parser_engine (str, optional): "byte" or "chunk", see connect_device_FS. Defaults to "byte".
+            bulk_read (bool, optional): Bulk reads for the FS protocol, see connect_device_FS. Defaults to False.
+            block_size (int, optional): Maximal number of bytes returned by one bulk read. Defaults to 4096.
+            read_size (int, optional): Minimal HS read size, see connect_device_HS. Defaults to 1024.
+            max_read_size (int, optional): Maximal HS read size, see connect_device_HS. Defaults to 65536.
+        """
+        if device is None:
+            from .simulation import SimulatedDevice
+
+            device = SimulatedDevice(n_el=self.n_el)
+        self.serial_protocol = protocol
+        self.device = device
+        print("Connection to", self.device.name, "is established.")
+        self.device_state = None
+        self.cMessageParser = MessageParser(
+            self.device,
+            devicetype=protocol,
+            engine=parser_engine,
+            bulk_read=bulk_read,
+            block_size=block_size,
+            dtype=self.dtype,
+            hs_read_size=read_size,
+            hs_max_read_size=max_read_size,
+        )
 
     def disconnect_device(self):
         """
@@ -155,6 +305,7 @@ class EIT_16_32_64_128:
         This method should be called to safely terminate communication with the device.
         """
         self.device.close()
+        self.device_state = None
 
     def send_message(self, message):
         """
@@ -257,25 +408,30 @@ class EIT_16_32_64_128:
         elif self.serial_protocol == "FS":
             self.SystemMessageCallback_usb_fs()
 
-    def write_command_string(self, command):
+    def write_command_string(self, command, timeout: float = 1.0):
         """
-        Sends a command string to the device using the appropriate serial protocol.
+        Sends a command string to the device and waits for its acknowledge.
 
-        Depending on the value of `self.serial_protocol`, the command is sent using either
-        high-speed ("HS") or full-speed ("FS") protocol. After sending the command, the
-        system message callback is triggered.
+        The command is sent with the serial protocol of the message parser. The method returns as soon as the
+        acknowledge (or not-acknowledge) of the device has arrived, so a command only costs its round trip time
+        instead of a full read timeout. Status messages are printed if `self.print_msg` is True.
 
         Args:
-            command (str): The command string to be sent to the device.
+            command (bytearray): The command string to be sent to the device.
+            timeout (float): Deadline in seconds for the acknowledge. Defaults to 1.0.
 
-        Raises:
-            AttributeError: If `self.device` does not have the required method for the selected protocol.
+        Returns:
+            int or None: Acknowledge code of the device (0x83: executed), None if no acknowledge arrived in time.
         """
         self.cMessageParser.bPrintMessages = self.print_msg
-        self.send_message(command)
-        self.cMessageParser.read_usb_till_timeout(
-            bSaveData=False, bDeleteDataFrame=True
-        )
+        ack = self.cMessageParser.command_transaction(command, fTimeout=timeout)
+        if ack is None:
+            print(f"No acknowledge within {timeout}s for command {list(command)}.")
+        elif ack != ACK_OK:
+            print(
+                f"Command {list(command)} failed: {msg_dict.get(f'0x{ack:02x}', hex(ack))}"
+            )
+        return ack
 
     # --- sciospec device commands
 
@@ -288,6 +444,7 @@ class EIT_16_32_64_128:
         self.print_msg = True
         self.write_command_string(bytearray([0xA1, 0x00, 0xA1]))
         self.print_msg = False
+        self.invalidate_device_state()
 
     def update_BurstCount(self, burst_count):
         """
@@ -305,9 +462,9 @@ class EIT_16_32_64_128:
         """
         self.setup.burst_count = burst_count
         self.print_msg = True
-        self.write_command_string(
-            bytearray([0xB0, 0x03, 0x02, 0x00, self.setup.burst_count, 0xB0])
-        )
+        command = bytearray([0xB0, 0x03, 0x02, 0x00, self.setup.burst_count, 0xB0])
+        ack = self.write_command_string(command)
+        self.update_device_state([("Burst count", command)], [ack])
         self.print_msg = False
 
     def update_FrameRate(self, framerate):
@@ -327,13 +484,11 @@ class EIT_16_32_64_128:
         """
         self.print_msg = True
         self.setup.framerate = framerate
-        self.write_command_string(
-            bytearray(
-                list(
-                    np.concatenate([[176, 5, 3], clTbt_sp(self.setup.framerate), [176]])
-                )
-            )
+        command = bytearray(
+            list(np.concatenate([[176, 5, 3], clTbt_sp(self.setup.framerate), [176]]))
         )
+        ack = self.write_command_string(command)
+        self.update_device_state([("Framerate", command)], [ack])
         self.print_msg = False
 
     def update_ExcitationFrequency(self, exc_freq):
@@ -353,16 +508,22 @@ class EIT_16_32_64_128:
         f_count = [0, 1]
         f_type = [0]  # linear/log
         # bytearray
-        self.write_command_string(
-            bytearray(
-                list(
-                    np.concatenate([[176, 12, 4], f_min, f_max, f_count, f_type, [176]])
-                )
-            )
+        command = bytearray(
+            list(np.concatenate([[176, 12, 4], f_min, f_max, f_count, f_type, [176]]))
         )
+        ack = self.write_command_string(command)
+        self.update_device_state([("Excitation frequencies", command)], [ack])
         self.print_msg = False
 
-    def SetMeasurementSetup(self, setup: EitMeasurementSetup):
+    def SetMeasurementSetup(
+        self,
+        setup: EitMeasurementSetup,
+        batched: bool = False,
+        batch_size: int = 32,
+        timeout: float = 1.0,
+        use_cache: bool = True,
+        commands: list = None,
+    ):
         """
         Configures the ScioSpec device measurement setup according to the provided EitMeasurementSetup dataclass.
 
@@ -375,6 +536,24 @@ class EIT_16_32_64_128:
         setup : EitMeasurementSetup
             The measurement setup configuration containing parameters such as burst count, amplitude, ADC range, gain,
             framerate, excitation frequency, number of electrodes, and injection skip.
+        batched : bool
+            If True, the command sequence is written in transfers of batch_size commands and the acknowledges are
+            collected and verified afterwards in order, instead of waiting for each acknowledge before the next
+            command.
+        batch_size : int
+            Number of commands per transfer in batched mode.
+        timeout : float
+            Deadline in seconds for the acknowledge of a command, in batched mode for the acknowledges of a transfer.
+        use_cache : bool
+            If True and the last applied setup is known, only the commands whose parameters changed are sent, see
+            setup_delta. If False, the full setup is sent.
+        commands : list
+            Full command sequence of setup, if it was already built with make_setup_commands. Defaults to building it.
+
+        Returns
+        -------
+        bool
+            True, if all commands were acknowledged as executed.
 
         Raises
         ------
@@ -387,16 +566,115 @@ class EIT_16_32_64_128:
         - ADC range and gain are set according to predefined device commands.
         - Electrode injection configuration is set for all electrodes based on the provided setup.
         - Output configuration is enabled for excitation, frequency stack, and timestamp.
+        - The applied commands are cached in `self.device_state`, see invalidate_device_state.
         """
-
+        if commands is None:
+            commands = self.make_setup_commands(setup)
+        if use_cache:
+            commands = self.setup_delta(commands)
         self.setup = setup
         self.cMessageParser.set_measurement_setup(self.setup)
         self.print_msg = False
-        self.ResetMeasurementSetup()
+        if batched:
+            acks = self.write_command_batch(commands, batch_size, timeout)
+        else:
+            acks = [self.write_command_string(cmd, timeout) for _, cmd in commands]
+        self.update_device_state(commands, acks)
+        return all(ack == ACK_OK for ack in acks)
+
+    def setup_delta(self, commands):
+        """
+        Reduces a setup command sequence to the commands whose parameters differ from the cached device state.
+
+        The excitation sequence can only be cleared by resetting the measurement setup, so if any injection command
+        changed (or the device state is unknown), the full sequence including the reset is returned.
+
+        Parameters
+        ----------
+        commands : list
+            List of (name, bytearray) tuples, see make_setup_commands.
+
+        Returns
+        -------
+        list
+            List of (name, bytearray) tuples to be sent.
+        """
+        return changed_setup_commands(self.device_state, commands)
+
+    def update_device_state(self, commands, acks):
+        """
+        Updates the cached device state with the sent commands. If a command was not executed, the device state is
+        unknown and the cache is invalidated.
+
+        Parameters
+        ----------
+        commands : list
+            List of sent (name, bytearray) tuples.
+        acks : list
+            Acknowledge code of each command.
+        """
+        if any(ack != ACK_OK for ack in acks):
+            self.invalidate_device_state()
+            return
+        if len(commands) > 0 and commands[0][0] == "Reset measurement setup":
+            self.device_state = {}
+        if self.device_state is None:
+            return
+        for name, cmd in commands:
+            if name != "Reset measurement setup":
+                self.device_state[name] = bytes(cmd)
+
+    def invalidate_device_state(self):
+        """
+        Marks the device state as unknown, so the next SetMeasurementSetup sends the full setup. Called after
+        SoftwareReset, ResetMeasurementSetup, failed commands and (dis)connecting.
+        """
+        self.device_state = None
+
+    def resync_device_state(self, setup: EitMeasurementSetup = None, **kwargs):
+        """
+        Invalidates the cached device state and sends the full measurement setup, e.g. after a SoftwareReset.
+
+        Parameters
+        ----------
+        setup : EitMeasurementSetup, optional
+            Setup to be applied. Defaults to the last applied setup.
+        **kwargs
+            Passed to SetMeasurementSetup (batched, batch_size, timeout).
+
+        Returns
+        -------
+        bool
+            True, if all commands were acknowledged as executed.
+        """
+        self.invalidate_device_state()
+        if setup is None:
+            setup = self.setup
+        return self.SetMeasurementSetup(setup, use_cache=False, **kwargs)
+
+    def make_setup_commands(self, setup: EitMeasurementSetup):
+        """
+        Builds the command sequence configuring the device according to setup, starting with the reset of the
+        measurement setup.
+
+        Parameters
+        ----------
+        setup : EitMeasurementSetup
+            The measurement setup configuration.
+
+        Returns
+        -------
+        list
+            List of (name, bytearray) tuples in the order they are sent.
+        """
+        commands = [("Reset measurement setup", bytearray([0xB0, 0x01, 0x01, 0xB0]))]
 
         # set burst count | for 3: ["B0 03 02 00 03 B0"]
-        self.write_command_string(
-            bytearray([0xB0, 0x03, 0x02, 0x00, setup.burst_count, 0xB0])
+        commands.append(
+            (
+                "Burst count",
+                bytearray([0xB0, 0x03, 0x02, 0x00, setup.burst_count, 0xB0]),
+            )
         )
 
         # set excitation alternating current amplitude double precision
@@ -407,46 +685,66 @@ class EIT_16_32_64_128:
                 f"Amplitude {setup.amplitude}A is out of available range.\nSet amplitude to 10mA."
             )
             setup.amplitude = 0.01
-        self.write_command_string(
-            bytearray(
-                list(np.concatenate([[176, 9, 5], clTbt_dp(setup.amplitude), [176]]))
+        commands.append(
+            (
+                "Excitation amplitude",
+                bytearray(
+                    list(
+                        np.concatenate([[176, 9, 5], clTbt_dp(setup.amplitude), [176]])
+                    )
+                ),
             )
         )
         # ADC range settings: [+/-1, +/-5, +/-10]
         # ADC range = +/-1  : B0 02 0D 01 B0
         # ADC range = +/-5  : B0 02 0D 02 B0
         # ADC range = +/-10 : B0 02 0D 03 B0
-        if setup.adc_range == 1:
-            self.write_command_string(bytearray([0xB0, 0x02, 0x0D, 0x01, 0xB0]))
-        elif setup.adc_range == 5:
-            self.write_command_string(bytearray([0xB0, 0x02, 0x0D, 0x02, 0xB0]))
-        elif setup.adc_range == 10:
-            self.write_command_string(bytearray([0xB0, 0x02, 0x0D, 0x03, 0xB0]))
+        adc_ranges = {1: 0x01, 5: 0x02, 10: 0x03}
+        if setup.adc_range in adc_ranges:
+            commands.append(
+                (
+                    "ADC range",
+                    bytearray([0xB0, 0x02, 0x0D, adc_ranges[setup.adc_range], 0xB0]),
+                )
+            )
         # Gain settings:
         # Gain = 1     : B0 03 09 01 00 B0
         # Gain = 10    : B0 03 09 01 01 B0
         # Gain = 100   : B0 03 09 01 02 B0
         # Gain = 1_000 : B0 03 09 01 03 B0
-        if setup.gain == 1:
-            self.write_command_string(bytearray([0xB0, 0x03, 0x09, 0x01, 0x00, 0xB0]))
-        elif setup.gain == 10:
-            self.write_command_string(bytearray([0xB0, 0x03, 0x09, 0x01, 0x01, 0xB0]))
-        elif setup.gain == 100:
-            self.write_command_string(bytearray([0xB0, 0x03, 0x09, 0x01, 0x02, 0xB0]))
-        elif setup.gain == 1_000:
-            self.write_command_string(bytearray([0xB0, 0x03, 0x09, 0x01, 0x03, 0xB0]))
+        gains = {1: 0x00, 10: 0x01, 100: 0x02, 1_000: 0x03}
+        if setup.gain in gains:
+            commands.append(
+                (
+                    "Gain",
+                    bytearray([0xB0, 0x03, 0x09, 0x01, gains[setup.gain], 0xB0]),
+                )
+            )
 
         # Single ended mode as standard setup, if else configured, skip patterns are possible:
-        self.update_measurement_mode(setup.mea_mode, boundary=setup.mea_mode_boundary)
-        # self.write_command_string(bytearray([0xB0, 0x03, 0x08, 0x01, 0x01, 0xB0]))
+        commands.append(
+            (
+                "Measurement mode",
+                self.measurement_mode_command(
+                    setup.mea_mode, boundary=setup.mea_mode_boundary
+                ),
+            )
+        )
 
         # Excitation switch type:
-        self.write_command_string(bytearray([0xB0, 0x02, 0x0C, 0x01, 0xB0]))
+        commands.append(
+            ("Excitation switch type", bytearray([0xB0, 0x02, 0x0C, 0x01, 0xB0]))
+        )
 
         # Set framerate:
-        self.write_command_string(
-            bytearray(
-                list(np.concatenate([[176, 5, 3], clTbt_sp(setup.framerate), [176]]))
+        commands.append(
+            (
+                "Framerate",
+                bytearray(
+                    list(
+                        np.concatenate([[176, 5, 3], clTbt_sp(setup.framerate), [176]])
+                    )
+                ),
             )
         )
         # Set frequencies:
@@ -455,12 +753,16 @@ class EIT_16_32_64_128:
         f_max = clTbt_sp(setup.exc_freq)
         f_count = [0, 1]
         f_type = [0]  # linear/log
-        # bytearray
-        self.write_command_string(
-            bytearray(
-                list(
-                    np.concatenate([[176, 12, 4], f_min, f_max, f_count, f_type, [176]])
-                )
+        commands.append(
+            (
+                "Excitation frequencies",
+                bytearray(
+                    list(
+                        np.concatenate(
+                            [[176, 12, 4], f_min, f_max, f_count, f_type, [176]]
+                        )
+                    )
+                ),
             )
         )
 
@@ -471,17 +773,70 @@ class EIT_16_32_64_128:
         el_inj = np.arange(1, setup.n_el + 1)
         el_gnd = np.roll(el_inj, -(setup.inj_skip + 1))
         for v_el, g_el in zip(el_inj, el_gnd):
-            self.write_command_string(bytearray([0xB0, 0x03, 0x06, v_el, g_el, 0xB0]))
+            commands.append(
+                (
+                    f"Injection {v_el}-{g_el}",
+                    bytearray([0xB0, 0x03, 0x06, v_el, g_el, 0xB0]),
+                )
+            )
 
-        self.print_msg = True
         # Set output configuration - enable all
         # |-- Excitation setting | [CT] 02 01 [enable/disable] [CT]
-        self.write_command_string(bytearray([0xB2, 0x02, 0x01, 0x01, 0xB2]))
+        commands.append(
+            (
+                "Output excitation setting",
+                bytearray([0xB2, 0x02, 0x01, 0x01, 0xB2]),
+            )
+        )
         # |-- Current row in the frequency stack | [CT] 02 02 [enable/disable] [CT]
-        self.write_command_string(bytearray([0xB2, 0x02, 0x02, 0x01, 0xB2]))
+        commands.append(
+            ("Output frequency row", bytearray([0xB2, 0x02, 0x02, 0x01, 0xB2]))
+        )
         # |-- Timestamp | [CT] 02 03 [enable/disable] [CT]
-        self.write_command_string(bytearray([0xB2, 0x02, 0x03, 0x01, 0xB2]))
-        self.print_msg = False
+        commands.append(("Output timestamp", bytearray([0xB2, 0x02, 0x03, 0x01, 0xB2])))
+        return commands
+
+    def write_command_batch(self, commands, batch_size: int = 32, timeout: float = 1.0):
+        """
+        Writes a command sequence in transfers of batch_size commands. After each transfer the acknowledges are
+        collected and verified in the order of the commands. The first failed command is reported by name.
+
+        Parameters
+        ----------
+        commands : list
+            List of (name, bytearray) tuples, see make_setup_commands.
+        batch_size : int
+            Number of commands written in one transfer.
+        timeout : float
+            Deadline in seconds for all acknowledges of one transfer.
+
+        Returns
+        -------
+        list
+            Acknowledge code of each command, None for commands without acknowledge.
+        """
+        self.cMessageParser.bPrintMessages = self.print_msg
+        batch_size = max(int(batch_size), 1)
+        acks = []
+        for start in range(0, len(commands), batch_size):
+            batch = commands[start : start + batch_size]
+            acks += self.cMessageParser.command_batch(
+                [cmd for _, cmd in batch], fTimeout=timeout
+            )
+
+        for (name, cmd), ack in zip(commands, acks):
+            if ack is None:
+                print(
+                    f"Only {sum(a is not None for a in acks)} of {len(commands)} commands acknowledged, "
+                    f"first missing: {name} {list(cmd)}."
+                )
+                break
+            if ack != ACK_OK:
+                print(
+                    f"Command {name} {list(cmd)} failed: {msg_dict.get(f'0x{ack:02x}', hex(ack))}"
+                )
+                break
+        return acks
 
     def SaveSettings(self):
         print("TBD (to be checked)")
@@ -504,44 +859,40 @@ class EIT_16_32_64_128:
         self.print_msg = True
         self.write_command_string(bytearray([0xB0, 0x01, 0x01, 0xB0]))
         self.print_msg = False
+        self.invalidate_device_state()
 
     def update_measurement_mode(
         self, meamode: str = "singleended", boundary: str = "internal"
     ):
         """
-        Retrieves and configures the measurement setup for the device based on the specified setup option.
+        Sets the single-ended or differential measure mode of the device.
 
         Parameters:
-            setup_of (str): A string identifier for the desired measurement setup option.
-                Supported options include:
-                    - 'Burst Count' (0x02)
-                    - 'Frame Rate' (0x03)
-                    - 'Excitation Frequencies' (0x04)
-                    - 'Excitation Amplitude' (0x05)
-                    - 'Excitation Sequence' (0x06)
-                    - 'Single-Ended or Differential Measure Mode' (0x08)
-                    - 'Gain Settings' (0x09)
-                    - 'Excitation Switch Type' (0x0C)
-
-        Note:
-            This method sends a command to the device to retrieve or configure the specified measurement setup.
-            The actual translation and handling of the response is TBD (to be implemented).
-        Burst Count                                    2 -> 0x02
-        Frame Rate                                     3 -> 0x03
-        Excitation Frequencies                         4 -> 0x04
-        Excitation Amplitude                           5 -> 0x05
-        Excitation Sequence                            6 -> 0x06
-        Single-Ended or Differential Measure Mode      7 -> 0x08
-        Gain Settings                                  8 -> 0x09
-        Excitation Switch Type                         9 -> 0x0C
+            meamode (str): Measure mode, "singleended".
+            boundary (str): Boundary of the measure mode, "internal".
         """
-
-        print("TBD (to be checked)")
         self.print_msg = True
-        self.write_command_string(bytearray([0xB1, 0x01, setup_of, 0xB1]))
-        print("TBD: Translation")
+        self.write_command_string(self.measurement_mode_command(meamode, boundary))
         self.print_msg = False
 
+    def measurement_mode_command(
+        self, meamode: str = "singleended", boundary: str = "internal"
+    ):
+        """
+        Builds the command of the single-ended or differential measure mode
+        [CT] 03 08 [mode] [boundary] [CT].
+
+        Only the single-ended mode with internal boundary is supported so far.
+
+        Raises:
+            ValueError: For other measure modes.
+        """
+        if meamode == "singleended" and boundary == "internal":
+            return bytearray([0xB0, 0x03, 0x08, 0x01, 0x01, 0xB0])
+        raise ValueError(
+            f"Unsupported measure mode: {meamode}, {boundary}. Only 'singleended', 'internal' is supported."
+        )
+
     def StartStopMeasurement(self, return_as="pot_mat"):
         """
         Starts and stops a measurement process using the configured serial protocol (HS or FS).
@@ -598,6 +949,10 @@ class EIT_16_32_64_128:
         bDeleteData: bool = False,
         sSavePath: str = "C/",
         bResultsFolder=False,
+        bThreaded: bool = False,
+        iQueueSize: int = 1024,
+        bAsyncSave: bool = False,
+        bDropOnOverflow: bool = False,
     ):
         """
         Starts and stops a measurement process using the configured serial protocol (HS or FS).
@@ -614,11 +969,19 @@ class EIT_16_32_64_128:
                 - "pot_mat": Returns the processed data as a matrix using `get_data_as_matrix()`.
                 Default is "pot_mat".
                 - else: data is only stored
-            bSaveData (bool): Specifies if the measured data is saved in NPZ format
+            bSaveData (bool or str): Specifies if the measured data is saved, True or "npz": one NPZ file per frame,
+                "recording": all frames are appended to a single recording file (see sciopy.recording)
             bDeleteData (bool): Specifies if the measured data is deleted out of memory after each EITframe, with
                 bSaveData=True, measured data is saved and then removed from RAM
             sSavePath (str): Specifies the sPath where the measured data is saved.
             bResultsFolder (bool): Specifies if additionally a folder in sSavePath is created to store the data in
+            bThreaded (bool): Specifies if the device is read out by a dedicated reader thread, while the received data
+                is interpreted and saved in a consumer thread (see MessageParser.read_usb_threaded)
+            iQueueSize (int): Maximal number of read buffers queued between reader and consumer thread
+            bAsyncSave (bool): Specifies if the frames are saved by a worker thread instead of inside the read loop, all
+                frames are saved when the measurement is finished
+            bDropOnOverflow (bool): Specifies if read buffers are dropped while the queue of bThreaded is full, by
+                default the reader thread waits for the consumer thread
 
         Returns:
             list or matrix: The measurement data in the format specified by `return_as`.
@@ -626,38 +989,66 @@ class EIT_16_32_64_128:
 
         # Start measurement
         self.cMessageParser.clear_out_data()
+        self.cMessageParser.reset_statistics()
         sCurrentPath = make_results_folder(
             bResultsFolder, bSaveData, sSavePath
         )  # No new path is created  if bResultsFolder=False
 
+        if timeout == 0 and self.setup.burst_count == 0:
+            print("Burst count for this setup needs to be >=1")
+            return
         self.send_message(bytearray([0xB4, 0x01, 0x01, 0xB4]))
         self.cMessageParser.bPrintMessages = False
-        if timeout != 0:
-            self.cMessageParser.read_usb_for_seconds(
-                timeout,
-                bSaveData=bSaveData,
-                bDeleteDataFrame=bDeleteData,
-                sSavePath=sCurrentPath,
-            )
-        else:
-            if self.setup.burst_count == 0:
-                print("Burst count for this setup needs to be >=1")
-                return
-            self.cMessageParser.read_usb_till_timeout(
+        # The measurement is stopped, the writer thread is stopped and the recording file finished, also if the
+        # acquisition fails
+        bStopped = False
+        try:
+            if bSaveData and bAsyncSave:
+                self.cMessageParser.start_async_writer()
+            if bThreaded:
+                self.cMessageParser.read_usb_threaded(
+                    timeout if timeout != 0 else None,
+                    bSaveData=bSaveData,
+                    bDeleteDataFrame=bDeleteData,
+                    sSavePath=sCurrentPath,
+                    iQueueSize=iQueueSize,
+                    bDropOnOverflow=bDropOnOverflow,
+                )
+            elif timeout != 0:
+                self.cMessageParser.read_usb_for_seconds(
+                    timeout,
+                    bSaveData=bSaveData,
+                    bDeleteDataFrame=bDeleteData,
+                    sSavePath=sCurrentPath,
+                )
+            else:
+                self.cMessageParser.read_usb_till_timeout(
+                    bSaveData=bSaveData,
+                    bDeleteDataFrame=bDeleteData,
+                    sSavePath=sCurrentPath,
+                )
+
+            # Stop measurement
+            self.send_message(bytearray([0xB4, 0x01, 0x00, 0xB4]))
+            bStopped = True
+            # All data is returned if wanted
+            data = self.cMessageParser.read_usb_till_timeout(
                 bSaveData=bSaveData,
                 bDeleteDataFrame=bDeleteData,
                 sSavePath=sCurrentPath,
+                bStartReset=False,
             )
-
-        # Stop measurement
-        self.send_message(bytearray([0xB4, 0x01, 0x00, 0xB4]))
-        # All data is returned if wanted
-        data = self.cMessageParser.read_usb_till_timeout(
-            bSaveData=bSaveData,
-            bDeleteDataFrame=bDeleteData,
-            sSavePath=sCurrentPath,
-            bStartReset=False,
-        )
+        finally:
+            if not bStopped:
+                # An error of the stop command must not hide the error of the acquisition
+                try:
+                    self.send_message(bytearray([0xB4, 0x01, 0x00, 0xB4]))
+                except Exception as e:
+                    print(f"Stop measurement command could not be sent: {e}")
+            try:
+                self.cMessageParser.stop_async_writer()
+            finally:
+                self.cMessageParser.close_recording()
 
         self.cMessageParser.clear_out_data()
         if bDeleteData:
@@ -669,6 +1060,59 @@ class EIT_16_32_64_128:
         elif return_as == "eitframe":
             return data
 
+    def iter_frames(
+        self,
+        timeout: float = 0,
+        max_frames: int = None,
+        bSaveData: bool = False,
+        sSavePath: str = "C/",
+        bResultsFolder=False,
+    ):
+        """
+        Starts a measurement and yields each EIT frame as soon as it is received, for online processing with per frame
+        latency. Received frames are not accumulated, so continuous measurements (burst_count=0) run with bounded
+        memory. The measurement is stopped when timeout or max_frames is reached or when the generator is closed,
+        e.g. by leaving a for loop over it.
+
+        Args:
+            timeout (float): Measurement time in seconds, 0: no time limit.
+            max_frames (int): Number of frames after which the measurement is stopped. Defaults to the burst count of
+                the setup, no limit for burst_count=0.
+            bSaveData (bool or str): Specifies if the frames are also saved, True or "npz": one NPZ file per frame,
+                "recording": single recording file
+            sSavePath (str): Specifies the path where the measured data is saved.
+            bResultsFolder (bool): Specifies if additionally a folder in sSavePath is created to store the data in
+
+        Yields:
+            EITFrame: The received frames, in order.
+        """
+        if max_frames is None and self.setup.burst_count > 0:
+            max_frames = self.setup.burst_count
+        self.cMessageParser.clear_out_data()
+        self.cMessageParser.reset_statistics()
+        sCurrentPath = make_results_folder(bResultsFolder, bSaveData, sSavePath)
+
+        self.send_message(bytearray([0xB4, 0x01, 0x01, 0xB4]))
+        self.cMessageParser.bPrintMessages = False
+        try:
+            yield from self.cMessageParser.iter_frames(
+                timeout if timeout != 0 else None,
+                max_frames,
+                bSaveData=bSaveData,
+                sSavePath=sCurrentPath,
+            )
+        finally:
+            # Stop measurement, remaining data is only saved
+            self.send_message(bytearray([0xB4, 0x01, 0x00, 0xB4]))
+            self.cMessageParser.read_usb_till_timeout(
+                bSaveData=bSaveData,
+                bDeleteDataFrame=True,
+                sSavePath=sCurrentPath,
+                bStartReset=False,
+            )
+            self.cMessageParser.close_recording()
+            self.cMessageParser.clear_out_data()
+
     def get_data_as_matrix(self):
         """
         Converts the raw EIT data into a 3D matrix of potentials.
@@ -677,8 +1121,10 @@ class EIT_16_32_64_128:
             - burst_count: Number of bursts in the measurement setup.
             - n_el: Number of electrodes.
 
-        For each burst, the method iterates through its frames, grouping channel data
-        into electrode signals and arranging them in the matrix according to their channel group.
+        self.data holds either the uint8 bursts of com_util.reshape_full_message_in_bursts_uint8, which are
+        reinterpreted and arranged in a single pass (see com_util.bursts_to_potential_matrix), or the SingleFrames
+        of split_bursts_in_frames, whose channel data is collected into arrays first. The matrix is filled at once
+        according to the channel group, see com_util.potential_matrix.
 
         After processing, self.data is replaced with the resulting matrix.
 
@@ -686,24 +1132,33 @@ class EIT_16_32_64_128:
             np.ndarray: A 3D complex-valued matrix containing the electrode potentials
             for each burst and channel group.
         """
-        pot_matrix = np.empty(
-            (self.setup.burst_count, self.n_el, self.n_el), dtype=complex
+        if isinstance(self.data, np.ndarray) and self.data.dtype == np.uint8:
+            pot_matrix = bursts_to_potential_matrix(
+                self.data, self.setup.burst_count, self.n_el, self.channel_group
+            )
+            self.data = pot_matrix
+            return pot_matrix
+        get_channels = attrgetter(*[f"ch_{ch + 1}" for ch in range(16)])
+        frames = [
+            (b_c, frame) for b_c, burst in enumerate(self.data) for frame in burst
+        ]
+        pot_matrix = potential_matrix(
+            [b_c for b_c, _ in frames],
+            [frame.channel_group for _, frame in frames],
+            np.array(
+                [
+                    (
+                        frame.channels
+                        if isinstance(frame, CompactSingleFrame)
+                        else get_channels(frame)
+                    )
+                    for _, frame in frames
+                ],
+                dtype=complex,
+            ),
+            self.setup.burst_count,
+            self.n_el,
         )
-
-        for b_c, burst in enumerate(self.data):
-            row = -1
-            for frame in burst:
-                curr_grp = frame.channel_group
-                if curr_grp == 1:
-                    row += 1
-                el_signs = list()
-                for ch in range(16):
-                    el_signs.append(frame.__dict__[f"ch_{ch + 1}"])
-
-                el_signs = np.array(el_signs)
-                start_idx = (curr_grp - 1) * 16
-                stop_idx = curr_grp * 16
-                pot_matrix[b_c, row, start_idx:stop_idx] = el_signs
         self.data = pot_matrix
         return pot_matrix
 
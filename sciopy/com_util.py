@@ -1,13 +1,13 @@
 """Serial data handling"""
 
-from typing import Union
+from typing import Tuple, Union
 
 try:
     import serial
 except ImportError:
     print("Could not import module: serial")
 
-from .sciopy_dataclasses import EitMeasurementSetup, SingleFrame
+from .sciopy_dataclasses import EitMeasurementSetup, SingleFrame, CompactSingleFrame
 
 import numpy as np
 import struct
@@ -15,6 +15,11 @@ import sys
 from glob import glob
 from .datatype_conversion import *
 
+# Unpadded hexadecimal notation of each byte value, as produced by del_hex_in_list
+HEX_STRINGS = np.array([format(i, "x") for i in range(256)])
+# Acknowledge message sent by the device when it has to hold up the data output
+HOLDUP_MESSAGE = [0x18, 0x01, 0x92, 0x18]
+
 
 def available_serial_ports() -> list:
     """
@@ -67,39 +72,22 @@ def clTbt_dp(val: float) -> list:
     return [int(ele) for ele in struct.pack(">d", val)]
 
 
-def reshape_full_message_in_bursts(lst: list, ssms: EitMeasurementSetup) -> np.ndarray:
+def reshape_full_message_in_bursts(
+    lst: list, ssms: EitMeasurementSetup, return_holdups: bool = False
+) -> np.ndarray:
     """
     Takes the full message buffer and splits this message depeding on the measurement configuration into the
-    burst count parts.
+    burst count parts. Data holdup messages [18 01 92 18] are removed before, see `remove_holdup_messages()`.
 
     Examples
     --------
     - input: n_el=16 -> lst.shape=(44804) | n_el=32 -> lst.shape=(89604,)
     - delete acknowledgement message: lst.shape=(4480,0) | lst.shape=(89600,)
     - split this depending on burst count: split_list.shape=(5, 8960) | split_list.shape=(5, 17920)
-    """
-
-    def length_correction(array: list) -> list:
-        """
-        Implemented by: Oveys Javanmardtilaki
-        """
-        seq_index = 0
-        mask = np.ones(len(array), dtype=bool)
-        seq_to_remove = ["18", "1", "92", "18"]
-        for i in range(len(array)):
-            if seq_to_remove[seq_index] in array[i]:
-                seq_index += 1
-                if seq_index == len(seq_to_remove):
-                    start = i - len(seq_to_remove) + 1
-                    end = i + 1
-                    mask[start:end] = False
-                    seq_index = 0
-            else:
-                seq_index = 0
-        new_array = array[mask]
-        return new_array
 
-    lst = length_correction(lst)
+    With return_holdups=True, the number of removed holdup messages is returned as well: (split_list, holdups).
+    """
+    lst, holdups = remove_holdup_messages(lst)
     split_list = []
     # delete acknowledgement message
     lst = lst[4:]
@@ -107,9 +95,96 @@ def reshape_full_message_in_bursts(lst: list, ssms: EitMeasurementSetup) -> np.n
     split_length = lst.shape[0] // ssms.burst_count
     for split in range(ssms.burst_count):
         split_list.append(lst[split * split_length : (split + 1) * split_length])
+    if return_holdups:
+        return np.array(split_list), holdups
     return np.array(split_list)
 
 
+def remove_holdup_messages(array: np.ndarray) -> Tuple[np.ndarray, int]:
+    """
+    Removes the data holdup messages [18 01 92 18] from the full message buffer. All positions are compared at once
+    with a sliding window, only the exact byte sequence is removed. Overlapping sequences (18 01 92 18 01 92 18) are
+    counted once.
+
+    Parameters
+    ----------
+    array : np.ndarray
+        full message buffer as uint8 array or as hexadecimal strings without "0x" (see `del_hex_in_list()`)
+
+    Returns
+    -------
+    Tuple[np.ndarray, int]
+        buffer without the holdup messages, number of removed holdup messages
+    """
+    array = np.asarray(array)
+    if array.dtype.kind == "U":
+        holdup = [format(b, "x") for b in HOLDUP_MESSAGE]
+    else:
+        holdup = HOLDUP_MESSAGE
+    iWindows = len(array) - len(holdup) + 1
+    if iWindows <= 0:
+        return array, 0
+    pbMatch = array[:iWindows] == holdup[0]
+    for i in range(1, len(holdup)):
+        pbMatch &= array[i : i + iWindows] == holdup[i]
+    piStarts = np.flatnonzero(pbMatch)
+    if np.any(np.diff(piStarts) < len(holdup)):
+        piKept = []
+        iNext = 0
+        for iStart in piStarts.tolist():
+            if iStart >= iNext:
+                piKept.append(iStart)
+                iNext = iStart + len(holdup)
+        piStarts = np.array(piKept, dtype=int)
+    mask = np.ones(len(array), dtype=bool)
+    mask[(piStarts[:, None] + np.arange(len(holdup))).ravel()] = False
+    return array[mask], len(piStarts)
+
+
+def length_correction(array: np.ndarray) -> np.ndarray:
+    """
+    Removes the data holdup messages [18 01 92 18] from the full message buffer, see `remove_holdup_messages()`.
+
+    Implemented by: Oveys Javanmardtilaki
+    """
+    return remove_holdup_messages(array)[0]
+
+
+def reshape_full_message_in_bursts_uint8(
+    array: np.ndarray, ssms: EitMeasurementSetup, return_holdups: bool = False
+) -> np.ndarray:
+    """
+    Equivalent of `reshape_full_message_in_bursts()` for the full message as uint8 array instead of hexadecimal
+    strings. The bytes are not converted to strings at any point.
+
+    Parameters
+    ----------
+    array : np.ndarray
+        full message buffer as uint8 array (or list of integers / bytes)
+    ssms : EitMeasurementSetup
+        measurement setup, burst_count is used
+    return_holdups : bool
+        if the number of removed holdup messages is returned as well
+
+    Returns
+    -------
+    np.ndarray
+        uint8 array of shape (burst count, bytes per burst), with return_holdups: (array, number of holdups)
+    """
+    if isinstance(array, (bytes, bytearray)):
+        array = np.frombuffer(array, dtype=np.uint8)
+    array, holdups = remove_holdup_messages(np.asarray(array, dtype=np.uint8))
+    # delete acknowledgement message
+    array = array[4:]
+    split_length = array.shape[0] // ssms.burst_count
+    split_list = array[: split_length * ssms.burst_count].reshape(
+        ssms.burst_count, split_length
+    )
+    if return_holdups:
+        return split_list, holdups
+    return split_list
+
+
 def parse_single_frame(lst_ele: np.ndarray) -> SingleFrame:
     """
     Parse single data to the class SingleFrame.
@@ -177,3 +252,233 @@ def split_bursts_in_frames(
         frame = []  # Reset channel depending single burst frame
     print("UNUSED CG " + str(iC))
     return np.array(burst_frame)
+
+
+def burst_to_messages(burst: np.ndarray) -> np.ndarray:
+    """
+    Reinterprets a burst of data messages as structured array of DATA_MESSAGE_DTYPE, without copying the bytes.
+
+    Parameters
+    ----------
+    burst : np.ndarray
+        uint8 array (or bytes) of consecutive 140 byte data messages, incomplete trailing bytes are ignored
+
+    Returns
+    -------
+    np.ndarray
+        structured array with one element per data message, the fields are named like the SingleFrame attributes
+    """
+    burst = np.ascontiguousarray(np.frombuffer(burst, dtype=np.uint8))
+    count = len(burst) // DATA_MESSAGE_DTYPE.itemsize
+    return np.frombuffer(burst, dtype=DATA_MESSAGE_DTYPE, count=count)
+
+
+def select_channel_groups(messages: np.ndarray, channel_group: list) -> np.ndarray:
+    """
+    Selects the data messages of the used channel groups.
+
+    Parameters
+    ----------
+    messages : np.ndarray
+        structured array of DATA_MESSAGE_DTYPE, see `burst_to_messages()`
+    channel_group : list
+        used channel groups, e.g. [1, 2]
+
+    Returns
+    -------
+    np.ndarray
+        structured array of the selected messages
+    """
+    return messages[np.isin(messages["channel_group"], channel_group)]
+
+
+def messages_to_compact_frames(messages: np.ndarray) -> list:
+    """
+    Creates CompactSingleFrames from data messages. The channels of all frames are kept in one complex64 array.
+
+    Parameters
+    ----------
+    messages : np.ndarray
+        structured array of DATA_MESSAGE_DTYPE, see `burst_to_messages()`
+
+    Returns
+    -------
+    list
+        CompactSingleFrame per message
+    """
+    channels = messages["data"].astype(np.float32).view(np.complex64)[..., 0]
+    return [
+        CompactSingleFrame(
+            start_tag=start_tag,
+            channel_group=channel_group,
+            excitation_stgs=excitation_stgs,
+            frequency_row=frequency_row,
+            timestamp=timestamp,
+            channels=channels,
+            end_tag=end_tag,
+            index=i,
+        )
+        for i, (
+            start_tag,
+            channel_group,
+            excitation_stgs,
+            frequency_row,
+            timestamp,
+            end_tag,
+        ) in enumerate(
+            zip(
+                messages["start_tag"].tolist(),
+                messages["channel_group"].tolist(),
+                messages["excitation_stgs"].tolist(),
+                messages["frequency_row"].tolist(),
+                messages["timestamp"].tolist(),
+                messages["end_tag"].tolist(),
+            )
+        )
+    ]
+
+
+def split_bursts_in_frames_uint8(
+    split_list: np.ndarray,
+    burst_count: int,
+    channel_group: list,
+    compact: bool = False,
+) -> np.ndarray:
+    """
+    Equivalent of `split_bursts_in_frames()` for the uint8 bursts of `reshape_full_message_in_bursts_uint8()`. Each
+    burst is reinterpreted at once with DATA_MESSAGE_DTYPE and filtered by channel group. The returned SingleFrames
+    are identical to the string based version (tags and frequency row as hexadecimal strings).
+
+    With compact=True, CompactSingleFrames are returned instead, which need a fraction of the memory (see
+    `messages_to_compact_frames()`).
+
+    Returns
+    -------
+    np.ndarray
+        channel depending burst frames
+    """
+    channel_names = [f"ch_{ch + 1}" for ch in range(16)]
+    iC = 0
+    burst_frame = []
+    for bursts in range(burst_count):
+        messages = burst_to_messages(split_list[bursts])
+        selected = select_channel_groups(messages, channel_group)
+        iC += len(messages) - len(selected)
+        if compact:
+            burst_frame.append(messages_to_compact_frames(selected))
+            continue
+
+        channel_groups = selected["channel_group"].tolist()
+        excitation_stgs = selected["excitation_stgs"].astype(int).tolist()
+        timestamps = selected["timestamp"].tolist()
+        values = selected["data"].astype(float).tolist()
+        start_tags = HEX_STRINGS[selected["start_tag"]]
+        end_tags = HEX_STRINGS[selected["end_tag"]]
+        # Frequency row as its two bytes
+        frequency_rows = HEX_STRINGS[
+            np.stack(
+                [selected["frequency_row"] >> 8, selected["frequency_row"] & 0xFF],
+                axis=-1,
+            )
+        ]
+
+        frame = []  # Channel group depending frame
+        for i in range(len(selected)):
+            channels = {
+                name: complex(re, im)
+                for name, (re, im) in zip(channel_names, values[i])
+            }
+            frame.append(
+                SingleFrame(
+                    start_tag=start_tags[i],
+                    channel_group=channel_groups[i],
+                    excitation_stgs=np.array(excitation_stgs[i]),
+                    frequency_row=frequency_rows[i],
+                    timestamp=timestamps[i],
+                    **channels,
+                    end_tag=end_tags[i],
+                )
+            )
+        burst_frame.append(frame)
+    print("UNUSED CG " + str(iC))
+    return np.array(burst_frame)
+
+
+def potential_matrix(
+    burst_index: np.ndarray,
+    channel_groups: np.ndarray,
+    channels: np.ndarray,
+    burst_count: int,
+    n_el: int,
+) -> np.ndarray:
+    """
+    Builds the potential matrix of `EIT_16_32_64_128.get_data_as_matrix()` from arrays with one entry per data
+    message, all messages are written at once with fancy indexing. Within a burst, every message of channel group 1
+    starts a new row, channel group g fills the columns (g - 1) * 16 to g * 16.
+
+    Parameters
+    ----------
+    burst_index : np.ndarray
+        burst of each message, ascending
+    channel_groups : np.ndarray
+        channel group of each message
+    channels : np.ndarray
+        complex values of the 16 channels of each message, shape (messages, 16)
+    burst_count : int
+        number of bursts
+    n_el : int
+        number of electrodes
+
+    Returns
+    -------
+    np.ndarray
+        complex matrix of shape (burst_count, n_el, n_el)
+    """
+    pot_matrix = np.zeros((burst_count, n_el, n_el), dtype=complex)
+    burst_index = np.asarray(burst_index, dtype=int)
+    channel_groups = np.asarray(channel_groups, dtype=int)
+    if len(burst_index) == 0:
+        return pot_matrix
+    new_row = channel_groups == 1
+    row_count = np.cumsum(new_row)
+    # Rows are counted per burst
+    burst_start = np.flatnonzero(np.r_[True, burst_index[1:] != burst_index[:-1]])
+    rows_before = (row_count - new_row)[burst_start]
+    rows = (
+        row_count
+        - np.repeat(rows_before, np.diff(np.r_[burst_start, len(burst_index)]))
+        - 1
+    )
+    cols = (channel_groups[:, None] - 1) * 16 + np.arange(16)
+    pot_matrix[burst_index[:, None], rows[:, None], cols] = channels
+    return pot_matrix
+
+
+def bursts_to_potential_matrix(
+    split_list: np.ndarray, burst_count: int, n_el: int, channel_group: list
+) -> np.ndarray:
+    """
+    Potential matrix directly from the uint8 bursts of `reshape_full_message_in_bursts_uint8()`, equivalent to
+    `split_bursts_in_frames_uint8()` followed by `EIT_16_32_64_128.get_data_as_matrix()` without creating
+    SingleFrames. The messages of all bursts are reinterpreted, selected and arranged in a single pass.
+
+    Returns
+    -------
+    np.ndarray
+        complex matrix of shape (burst_count, n_el, n_el)
+    """
+    split_list = np.asarray(split_list, dtype=np.uint8)[:burst_count]
+    # Incomplete trailing bytes of each burst are ignored
+    burst_messages = split_list.shape[1] // DATA_MESSAGE_DTYPE.itemsize
+    messages = burst_to_messages(
+        split_list[:, : burst_messages * DATA_MESSAGE_DTYPE.itemsize].reshape(-1)
+    )
+    selected = np.isin(messages["channel_group"], channel_group)
+    burst_index = np.repeat(np.arange(len(split_list)), burst_messages)[selected]
+    messages = messages[selected]
+    channels = (
+        messages["data"].astype(np.float32).view(np.complex64)[..., 0].astype(complex)
+    )
+    return potential_matrix(
+        burst_index, messages["channel_group"], channels, burst_count, n_el
+    )
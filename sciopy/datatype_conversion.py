@@ -13,6 +13,20 @@ TWOPOWER24 = 16777216
 TWOPOWER16 = 65536
 TWOPOWER8 = 256
 
+# Data message 0xB4: [CT][LEN=137][CG][ESout][ESin][FR 2 bytes][Timestamp 4 bytes][16 x (re, im) float32][CT]
+DATA_MESSAGE_DTYPE = np.dtype(
+    [
+        ("start_tag", "u1"),
+        ("length", "u1"),
+        ("channel_group", "u1"),
+        ("excitation_stgs", "u1", (2,)),
+        ("frequency_row", ">u2"),
+        ("timestamp", ">u4"),
+        ("data", ">f4", (16, 2)),
+        ("end_tag", "u1"),
+    ]
+)
+
 
 # -------------------------------------------------------------------------------------------------------------------- #
 # -------------------------------------------------------------------------------------------------------------------- #
@@ -195,6 +209,49 @@ def two_byte_to_int(bytelist):
     return TWOPOWER8 * bytelist[0] + bytelist[1]
 
 
+# -------------------------------------------------------------------------------------------------------------------- #
+def timestamp_to_int(timestamp):
+    """
+    Converts a timestamp given as int or as list of 4 integers representing bytes MSB first to int.
+
+    Parameters
+    ----------
+    timestamp : int or np.ndarray/list of 4 integers representing bytes MSB first
+
+    Returns
+    -------
+    int
+        integer number
+    """
+    if np.ndim(timestamp) > 0:
+        return four_byte_to_int([int(b) for b in timestamp])
+    return int(timestamp)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def int_to_timestamp(value):
+    """
+    Converts an integer timestamp back to the list of 4 integers representing bytes MSB first, as received from the
+    device and stored in EITFrame.timestamp1. Inverse of timestamp_to_int.
+
+    Parameters
+    ----------
+    value : int
+
+    Returns
+    -------
+    list
+        4 integers representing bytes MSB first
+    """
+    value = int(value)
+    return [
+        (value >> 24) & 0xFF,
+        (value >> 16) & 0xFF,
+        (value >> 8) & 0xFF,
+        value & 0xFF,
+    ]
+
+
 # -------------------------------------------------------------------------------------------------------------------- #
 def bytelist_to_int(bytelist):
     """
@@ -0,0 +1,239 @@
+"""asyncio interface for the Sciospec EIT devices"""
+
+import asyncio
+import time
+from collections import deque
+
+import numpy as np
+
+from .sciopy_dataclasses import EitMeasurementSetup
+from .usb_message_parser import (
+    ACK_OK,
+    msg_dict,
+    copy_eit_frame,
+    make_results_folder,
+)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# -------------------------------------------------------------------------------------------------------------------- #
+class AsyncEIT:
+    """
+    asyncio counterpart of the EIT_16_32_64_128 command and acquisition methods. The device is polled without blocking
+    the event loop: only already received bytes are read (MessageParser.read_available) and the coroutine sleeps for
+    poll_interval when nothing has arrived. Several devices and other I/O can so be driven from one event loop.
+
+    The wrapped EIT_16_32_64_128 must be connected. Its MessageParser, setup and cached device state are shared, so
+    blocking and async calls can be mixed, but not run at the same time.
+    """
+
+    def __init__(self, eit, poll_interval: float = 0.002):
+        """
+        Args:
+            eit: Connected EIT_16_32_64_128
+            poll_interval: Time in seconds to sleep when no data is available
+        """
+        self.cEIT = eit
+        self.fPollInterval = poll_interval
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    @property
+    def cParser(self):
+        return self.cEIT.cMessageParser
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    async def read_available(self):
+        """
+        Reads the received bytes, sleeps for the poll interval if there are none.
+        Returns:
+            Byte(s) read from USB, empty if nothing was received
+        """
+        buffer = self.cParser.read_buffer(self.cParser.read_available)
+        if not buffer:
+            await asyncio.sleep(self.fPollInterval)
+        return buffer
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    async def wait_for_command_replies(
+        self, iCount: int, fTimeout: float = 1.0, bSaveData=False, sSavePath="C/"
+    ):
+        """
+        Async counterpart of MessageParser.wait_for_command_replies.
+        Returns:
+            List of the acknowledge codes in order of arrival, shorter than iCount on timeout
+        """
+        cParser = self.cParser
+        fDeadline = time.perf_counter() + fTimeout
+        while len(cParser.piCommandReplies) < iCount:
+            if time.perf_counter() > fDeadline:
+                break
+            buffer = await self.read_available()
+            if buffer:
+                cParser.parse_buffer(buffer, bSaveData, True, sSavePath)
+        piReplies = cParser.piCommandReplies[:iCount]
+        del cParser.piCommandReplies[:iCount]
+        return piReplies
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    async def command(self, command, timeout: float = 1.0):
+        """
+        Sends a command and waits for its acknowledge, see EIT_16_32_64_128.write_command_string.
+        Args:
+            command: bytearray of the command
+            timeout: Deadline in seconds for the acknowledge
+        Returns:
+            Acknowledge code (0x83: executed), None if no acknowledge arrived in time
+        """
+        self.cParser.bPrintMessages = self.cEIT.print_msg
+        self.cParser.piCommandReplies.clear()
+        self.cParser.device_send(command)
+        piReplies = await self.wait_for_command_replies(1, timeout)
+        if len(piReplies) == 0:
+            print(f"No acknowledge within {timeout}s for command {list(command)}.")
+            return None
+        if piReplies[0] != ACK_OK:
+            sMessage = msg_dict.get(f"0x{piReplies[0]:02x}", hex(piReplies[0]))
+            print(f"Command {list(command)} failed: {sMessage}")
+        return piReplies[0]
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    async def command_batch(self, commands, batch_size: int = 32, timeout: float = 1.0):
+        """
+        Sends (name, command) tuples in transfers of batch_size commands, see EIT_16_32_64_128.write_command_batch.
+        Returns:
+            Acknowledge code of each command, None for commands without acknowledge
+        """
+        self.cParser.bPrintMessages = self.cEIT.print_msg
+        batch_size = max(int(batch_size), 1)
+        piAcks = []
+        for iStart in range(0, len(commands), batch_size):
+            batch = commands[iStart : iStart + batch_size]
+            self.cParser.piCommandReplies.clear()
+            self.cParser.device_send(
+                bytearray().join(bytes(command) for _, command in batch)
+            )
+            piReplies = await self.wait_for_command_replies(len(batch), timeout)
+            piAcks += piReplies + [None] * (len(batch) - len(piReplies))
+        for (sName, command), iAck in zip(commands, piAcks):
+            if iAck is None:
+                print(f"No acknowledge for command {sName} {list(command)}.")
+                break
+            if iAck != ACK_OK:
+                sMessage = msg_dict.get(f"0x{iAck:02x}", hex(iAck))
+                print(f"Command {sName} {list(command)} failed: {sMessage}")
+                break
+        return piAcks
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    async def set_measurement_setup(
+        self,
+        setup: EitMeasurementSetup,
+        batched: bool = True,
+        batch_size: int = 32,
+        timeout: float = 1.0,
+        use_cache: bool = True,
+    ):
+        """
+        Async counterpart of EIT_16_32_64_128.SetMeasurementSetup.
+        Returns:
+            True, if all commands were acknowledged as executed
+        """
+        cEIT = self.cEIT
+        commands = cEIT.make_setup_commands(setup)
+        if use_cache:
+            commands = cEIT.setup_delta(commands)
+        cEIT.setup = setup
+        self.cParser.set_measurement_setup(setup)
+        cEIT.print_msg = False
+        if batched:
+            piAcks = await self.command_batch(commands, batch_size, timeout)
+        else:
+            piAcks = [await self.command(command, timeout) for _, command in commands]
+        cEIT.update_device_state(commands, piAcks)
+        return all(iAck == ACK_OK for iAck in piAcks)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    async def frames(
+        self,
+        timeout: float = 0,
+        max_frames: int = None,
+        bSaveData=False,
+        sSavePath: str = "C/",
+        bResultsFolder=False,
+        stop_timeout: float = 1.0,
+    ):
+        """
+        Async generator: starts a measurement and yields each EIT frame as soon as it is received, see
+        EIT_16_32_64_128.iter_frames. The measurement is stopped when timeout or max_frames is reached or when the
+        generator is closed; the data following the stop command is read until its acknowledge. With timeout=0,
+        max_frames=None and burst_count=0 the measurement runs endlessly, the caller has to break out of the loop.
+        Args:
+            timeout: Measurement time in seconds, 0: no time limit
+            max_frames: Number of frames after which the measurement is stopped, defaults to the burst count
+            bSaveData: if the frames are also saved, True/"npz": one file per frame, "recording": single file
+            sSavePath: Path where the data is saved
+            bResultsFolder: if additionally a folder in sSavePath is created to store the data in
+            stop_timeout: Deadline in seconds for the acknowledge of the stop command
+        Yields:
+            EITFrame
+        """
+        cEIT = self.cEIT
+        cParser = self.cParser
+        if max_frames is None and cEIT.setup.burst_count > 0:
+            max_frames = cEIT.setup.burst_count
+        cParser.clear_out_data()
+        cParser.reset_statistics()
+        sCurrentPath = make_results_folder(bResultsFolder, bSaveData, sSavePath)
+
+        pFrames = deque()
+        cParser.cFrameCallback = lambda frame: pFrames.append(copy_eit_frame(frame))
+        cParser.bPrintMessages = False
+        cParser.device_send(bytearray([0xB4, 0x01, 0x01, 0xB4]))
+        fEnd = None if timeout == 0 else time.perf_counter() + timeout
+        iFrames = 0
+        try:
+            while fEnd is None or time.perf_counter() < fEnd:
+                buffer = await self.read_available()
+                if buffer:
+                    cParser.parse_buffer(buffer, bSaveData, True, sCurrentPath)
+                while pFrames:
+                    yield pFrames.popleft()
+                    iFrames += 1
+                    if max_frames is not None and iFrames >= max_frames:
+                        return
+        finally:
+            cParser.cFrameCallback = None
+            # Stop measurement, remaining data is only saved
+            cParser.piCommandReplies.clear()
+            cParser.device_send(bytearray([0xB4, 0x01, 0x00, 0xB4]))
+            await self.wait_for_command_replies(
+                1, stop_timeout, bSaveData, sCurrentPath
+            )
+            cParser.close_recording()
+            cParser.clear_out_data()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    async def measure(self, timeout: float = 0, max_frames: int = None, **kwargs):
+        """
+        Measures and returns all frames as matrix, async counterpart of EIT_16_32_64_128.StartStopMeasurement.
+        Args:
+            timeout: Measurement time in seconds, 0: setup.burst_count frames are measured
+            max_frames: Number of frames after which the measurement is stopped
+            **kwargs: Passed to frames (bSaveData, sSavePath, bResultsFolder)
+        Returns:
+            np.array of shape [Number frames, num injection settings, channels]
+        Raises:
+            ValueError: If neither timeout, max_frames nor the burst count of the setup limit the measurement
+        """
+        if timeout == 0 and max_frames is None and self.cEIT.setup.burst_count == 0:
+            raise ValueError(
+                "Burst count for this setup needs to be >=1, or timeout or max_frames must be given"
+            )
+        cParser = self.cParser
+        pFrames = []
+        async for frame in self.frames(timeout, max_frames, **kwargs):
+            pFrames.append(frame.ppcData)
+        return np.reshape(
+            np.array(pFrames, dtype=cParser.dtype),
+            (len(pFrames), cParser.iNumExcitationSettings, -1),
+        )
@@ -0,0 +1,286 @@
+"""Preallocated columnar storage of received EIT frames"""
+
+import numpy as np
+
+from .sciopy_dataclasses import EITFrame
+from .datatype_conversion import timestamp_to_int, int_to_timestamp
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# -------------------------------------------------------------------------------------------------------------------- #
+class FrameStore:
+    """
+    Growable, preallocated storage of EIT frames. The data of all frames is kept in one array of shape
+    [frames, excitation settings, channels] with parallel arrays for the timestamps, excitation and frequency
+    settings. New frames are written in place into the next free slot, the capacity is doubled when it is reached.
+
+    The store behaves like the former list of EITFrames: len(), indexing and iteration return EITFrames whose arrays
+    are views into the store. timestamp1 is kept as integer and returned as the 4 received bytes, like in the parsed
+    frames.
+    """
+
+    def __init__(
+        self,
+        n_el: int,
+        iNumExcitationSettings: int,
+        iNumChannels: int,
+        iNumFreqSettings: int = 1,
+        iCapacity: int = 64,
+        dtype=np.complex64,
+    ):
+        """
+        Args:
+            n_el: Number of used electrodes
+            iNumExcitationSettings: Number of excitation settings per frame
+            iNumChannels: Number of measured channels per excitation setting (all channel groups combined)
+            iNumFreqSettings: Number of frequency settings per frame
+            iCapacity: Number of frames the store is initially allocated for
+            dtype: Complex data type of the measured data
+        """
+        self.n_el = n_el
+        self.iNumExcitationSettings = iNumExcitationSettings
+        self.iNumChannels = iNumChannels
+        self.iNumFreqSettings = iNumFreqSettings
+        self.dtype = np.dtype(dtype)
+        self.iCount = 0
+        self.cPendingFrame = None
+
+        iCapacity = max(int(iCapacity), 1)
+        self.ppcData = np.zeros(
+            (iCapacity, iNumExcitationSettings, iNumChannels), dtype=self.dtype
+        )
+        self.ppiExcitationStgs = np.zeros(
+            (iCapacity, iNumExcitationSettings, 2), dtype=int
+        )
+        self.ppiFrequencyStgs = np.zeros((iCapacity, iNumFreqSettings), dtype=int)
+        self.piTimestamp1 = np.zeros((iCapacity,), dtype=np.int64)
+        self.pfTimestamp2 = np.zeros((iCapacity,), dtype=float)
+        self.pfTimestampPC = np.zeros((iCapacity,), dtype=float)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    @property
+    def iCapacity(self):
+        return self.ppcData.shape[0]
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def reserve(self, iFrames: int):
+        """
+        Makes sure the store can hold at least iFrames frames, grows by doubling the capacity.
+        Args:
+            iFrames: Number of frames to be stored
+        """
+        if iFrames <= self.iCapacity:
+            return
+        iCapacity = self.iCapacity
+        while iCapacity < iFrames:
+            iCapacity *= 2
+        for sName in [
+            "ppcData",
+            "ppiExcitationStgs",
+            "ppiFrequencyStgs",
+            "piTimestamp1",
+            "pfTimestamp2",
+            "pfTimestampPC",
+        ]:
+            pOld = getattr(self, sName)
+            pNew = np.zeros((iCapacity,) + pOld.shape[1:], dtype=pOld.dtype)
+            pNew[: self.iCount] = pOld[: self.iCount]
+            setattr(self, sName, pNew)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def new_frame(self) -> EITFrame:
+        """
+        Clears the next free slot and returns it as EITFrame. The arrays of the frame are views into the store, so the
+        frame is filled in place. It is only counted as stored after append().
+        Returns:
+            EITFrame of the next free slot
+        """
+        self.reserve(self.iCount + 1)
+        i = self.iCount
+        self.ppcData[i] = 0
+        self.ppiExcitationStgs[i] = 0
+        self.ppiFrequencyStgs[i] = 0
+        self.cPendingFrame = EITFrame(
+            n_el=self.n_el,
+            excitation_stgs=self.ppiExcitationStgs[i],
+            frequency_stgs=self.ppiFrequencyStgs[i],
+            timestamp1=0,
+            timestamp2=0,
+            timestamp_pc=0,
+            ppcData=self.ppcData[i].reshape(-1),
+        )
+        return self.cPendingFrame
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def append(self, frame: EITFrame):
+        """
+        Stores a frame. A frame from new_frame() is already in place, any other frame is copied into the store.
+        Args:
+            frame: EITFrame to be stored
+        """
+        if frame is not self.cPendingFrame:
+            self.reserve(self.iCount + 1)
+            self.ppcData[self.iCount] = np.reshape(
+                frame.ppcData, (self.iNumExcitationSettings, self.iNumChannels)
+            )
+            self.ppiExcitationStgs[self.iCount] = frame.excitation_stgs
+            self.ppiFrequencyStgs[self.iCount] = frame.frequency_stgs
+        i = self.iCount
+        self.piTimestamp1[i] = timestamp_to_int(frame.timestamp1)
+        self.pfTimestamp2[i] = frame.timestamp2
+        self.pfTimestampPC[i] = frame.timestamp_pc
+        self.iCount += 1
+        self.cPendingFrame = None
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def clear(self):
+        """
+        Deletes all stored frames, the allocated memory is kept.
+        """
+        self.iCount = 0
+        self.cPendingFrame = None
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def get_data_as_matrix(self):
+        """
+        Returns:
+            View of the stored data of shape [Number frames, num injection settings, channels]
+        """
+        return self.ppcData[: self.iCount]
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def get_timestamps(self):
+        """
+        Returns:
+            Views of the timestamp1 (as integer), timestamp2 and timestamp_pc arrays of the stored frames
+        """
+        return (
+            self.piTimestamp1[: self.iCount],
+            self.pfTimestamp2[: self.iCount],
+            self.pfTimestampPC[: self.iCount],
+        )
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def get_excitation_stgs(self):
+        """
+        Returns:
+            View of the excitation settings of shape [Number frames, num injection settings, 2]
+        """
+        return self.ppiExcitationStgs[: self.iCount]
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def get_compact_frames(self):
+        """
+        Returns:
+            List of CompactEITFrames of all stored frames, each only holds a reference to the store and its index
+        """
+        return [CompactEITFrame(self, i) for i in range(self.iCount)]
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def __len__(self):
+        return self.iCount
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.iCount))]
+        if index < 0:
+            index += self.iCount
+        if not 0 <= index < self.iCount:
+            raise IndexError("FrameStore index out of range")
+        return EITFrame(
+            n_el=self.n_el,
+            excitation_stgs=self.ppiExcitationStgs[index],
+            frequency_stgs=self.ppiFrequencyStgs[index],
+            timestamp1=int_to_timestamp(self.piTimestamp1[index]),
+            timestamp2=float(self.pfTimestamp2[index]),
+            timestamp_pc=float(self.pfTimestampPC[index]),
+            ppcData=self.ppcData[index].reshape(-1),
+        )
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def __iter__(self):
+        for i in range(self.iCount):
+            yield self[i]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# -------------------------------------------------------------------------------------------------------------------- #
+class CompactEITFrame:
+    """
+    Slotted variant of EITFrame, backed by the arrays of a FrameStore. It only holds the store and the frame index,
+    the EITFrame attributes are read from the store on access (arrays as views), so they stay valid when the store
+    grows. Assigned attributes are written through to the store, arrays must keep the shape of the store. n_el is
+    shared by all frames of the store and cannot be assigned.
+    """
+
+    __slots__ = ("cStore", "iIndex")
+
+    def __init__(self, cStore: FrameStore, iIndex: int):
+        """
+        Args:
+            cStore: FrameStore holding the frame
+            iIndex: Index of the frame in the store
+        """
+        self.cStore = cStore
+        self.iIndex = iIndex
+
+    @property
+    def n_el(self):
+        return self.cStore.n_el
+
+    @property
+    def excitation_stgs(self):
+        return self.cStore.ppiExcitationStgs[self.iIndex]
+
+    @excitation_stgs.setter
+    def excitation_stgs(self, value):
+        self.cStore.ppiExcitationStgs[self.iIndex] = value
+
+    @property
+    def frequency_stgs(self):
+        return self.cStore.ppiFrequencyStgs[self.iIndex]
+
+    @frequency_stgs.setter
+    def frequency_stgs(self, value):
+        self.cStore.ppiFrequencyStgs[self.iIndex] = value
+
+    @property
+    def timestamp1(self):
+        return int_to_timestamp(self.cStore.piTimestamp1[self.iIndex])
+
+    @timestamp1.setter
+    def timestamp1(self, value):
+        self.cStore.piTimestamp1[self.iIndex] = timestamp_to_int(value)
+
+    @property
+    def timestamp2(self):
+        return float(self.cStore.pfTimestamp2[self.iIndex])
+
+    @timestamp2.setter
+    def timestamp2(self, value):
+        self.cStore.pfTimestamp2[self.iIndex] = value
+
+    @property
+    def timestamp_pc(self):
+        return float(self.cStore.pfTimestampPC[self.iIndex])
+
+    @timestamp_pc.setter
+    def timestamp_pc(self, value):
+        self.cStore.pfTimestampPC[self.iIndex] = value
+
+    @property
+    def ppcData(self):
+        return self.cStore.ppcData[self.iIndex].reshape(-1)
+
+    @ppcData.setter
+    def ppcData(self, value):
+        self.cStore.ppcData[self.iIndex] = np.reshape(
+            value, self.cStore.ppcData.shape[1:]
+        )
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(n_el={self.n_el}, index={self.iIndex}, timestamp1={self.timestamp1}, "
+            f"timestamp_pc={self.timestamp_pc})"
+        )
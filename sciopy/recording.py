@@ -0,0 +1,446 @@
+"""Append-only single file recording of EIT frames"""
+
+import os
+import json
+import struct
+import dataclasses
+import numpy as np
+
+from .sciopy_dataclasses import EITFrame, EitMeasurementSetup
+from .datatype_conversion import timestamp_to_int, int_to_timestamp
+
+# File layout (all numbers little endian):
+#   header  : MAGIC | version (uint16) | json length (uint32) | json meta data | padding to DATA_ALIGNMENT
+#   data    : contiguous frame records of fixed size, see frame_record_dtype()
+#   index   : frame offset table (uint64 per frame), written on close
+#   footer  : INDEX_MAGIC | number of frames (uint64) | offset of the index (uint64)
+# A recording without footer (e.g. aborted measurement) is read up to its last complete frame record.
+MAGIC = b"SCIOREC\x00"
+INDEX_MAGIC = b"SCIOIDX\x00"
+VERSION = 1
+DATA_ALIGNMENT = 64
+FOOTER_LEN = len(INDEX_MAGIC) + 16
+RECORDING_EXTENSION = ".eitrec"
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def frame_record_dtype(
+    iNumExcitationSettings: int,
+    iNumChannels: int,
+    iNumFreqSettings: int = 1,
+    dtype=np.complex64,
+) -> np.dtype:
+    """
+    Structured data type of a single frame record within a recording.
+
+    Parameters
+    ----------
+    iNumExcitationSettings : int
+        number of excitation settings per frame
+    iNumChannels : int
+        number of channels per excitation setting (all channel groups combined)
+    iNumFreqSettings : int
+        number of frequency settings per frame
+    dtype : np.dtype
+        complex data type of the measured data
+
+    Returns
+    -------
+    np.dtype
+        frame record data type
+    """
+    return np.dtype(
+        [
+            ("timestamp1", "<i8"),
+            ("timestamp2", "<f8"),
+            ("timestamp_pc", "<f8"),
+            ("excitation_stgs", "<i4", (iNumExcitationSettings, 2)),
+            ("frequency_stgs", "<i4", (iNumFreqSettings,)),
+            (
+                "data",
+                np.dtype(dtype).newbyteorder("<"),
+                (iNumExcitationSettings, iNumChannels),
+            ),
+        ]
+    )
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def new_recording_path(path: str) -> str:
+    """
+    Returns the first not existing recording file name eitrecording_XXX.eitrec in the directory path.
+
+    Parameters
+    ----------
+    path : str
+        directory, given like the save paths of the npz frames (e.g. "C/")
+
+    Returns
+    -------
+    str
+        path of the new recording file
+    """
+    idx = 1
+    while os.path.exists(path + f"eitrecording_{idx:03d}{RECORDING_EXTENSION}"):
+        idx += 1
+    return path + f"eitrecording_{idx:03d}{RECORDING_EXTENSION}"
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def json_default(value):
+    """
+    Converts numpy values in the header meta data to JSON serializable Python values, used as default of json.dumps.
+    Setups built from arrays often hold numpy scalars, e.g. np.int64 for n_el or burst_count.
+
+    Parameters
+    ----------
+    value :
+        value json cannot serialize
+
+    Returns
+    -------
+    int, float, complex, bool, str or list
+        Python value
+    """
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    if isinstance(value, complex):
+        return [value.real, value.imag]
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# -------------------------------------------------------------------------------------------------------------------- #
+class RecordingWriter:
+    """
+    Appends EIT frames to a single recording file. Frames are collected in a preallocated chunk of frame records and
+    written with one call per chunk. The frame offset table and footer are written on close().
+    """
+
+    def __init__(
+        self,
+        sFilePath: str,
+        n_el: int,
+        iNumExcitationSettings: int,
+        iNumChannels: int,
+        iNumFreqSettings: int = 1,
+        dtype=np.complex64,
+        setup: EitMeasurementSetup = None,
+        iChunkFrames: int = 64,
+    ):
+        """
+        Args:
+            sFilePath: Path of the recording file, an existing file is overwritten
+            n_el: Number of used electrodes
+            iNumExcitationSettings: Number of excitation settings per frame
+            iNumChannels: Number of measured channels per excitation setting (all channel groups combined)
+            iNumFreqSettings: Number of frequency settings per frame
+            dtype: Complex data type the measured data is stored in
+            setup: EitMeasurementSetup of the measurement, stored in the header
+            iChunkFrames: Number of frames written to the file at once
+        """
+        self.sFilePath = sFilePath
+        self.cRecordDtype = frame_record_dtype(
+            iNumExcitationSettings, iNumChannels, iNumFreqSettings, dtype
+        )
+        self.pChunk = np.zeros((max(int(iChunkFrames), 1),), dtype=self.cRecordDtype)
+        self.iChunkCount = 0
+        self.iFramesWritten = 0
+
+        dMeta = {
+            "n_el": int(n_el),
+            "num_excitation_settings": int(iNumExcitationSettings),
+            "num_channels": int(iNumChannels),
+            "num_freq_settings": int(iNumFreqSettings),
+            "dtype": np.dtype(dtype).str,
+            "record_size": self.cRecordDtype.itemsize,
+            "setup": None if setup is None else dataclasses.asdict(setup),
+        }
+        bMeta = json.dumps(dMeta, default=json_default).encode("utf-8")
+        iHeaderLen = len(MAGIC) + 6 + len(bMeta)
+        self.iDataOffset = -(-iHeaderLen // DATA_ALIGNMENT) * DATA_ALIGNMENT
+
+        self.cFile = open(sFilePath, "wb")
+        self.cFile.write(MAGIC)
+        self.cFile.write(struct.pack("<HI", VERSION, len(bMeta)))
+        self.cFile.write(bMeta)
+        self.cFile.write(b"\x00" * (self.iDataOffset - iHeaderLen))
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    @property
+    def iFramesPending(self):
+        """
+        Number of frames collected, but not yet written to the file
+        """
+        return self.iChunkCount
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def write_frame(self, frame: EITFrame):
+        """
+        Appends a frame to the recording.
+        Args:
+            frame: EITFrame to be stored
+        """
+        pRecord = self.pChunk[self.iChunkCount]
+        pRecord["timestamp1"] = timestamp_to_int(frame.timestamp1)
+        pRecord["timestamp2"] = frame.timestamp2
+        pRecord["timestamp_pc"] = frame.timestamp_pc
+        pRecord["excitation_stgs"] = frame.excitation_stgs
+        pRecord["frequency_stgs"] = frame.frequency_stgs
+        pRecord["data"] = np.reshape(frame.ppcData, pRecord["data"].shape)
+        self.iChunkCount += 1
+        if self.iChunkCount == len(self.pChunk):
+            self.flush()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def flush(self):
+        """
+        Writes all collected frames to the file.
+        """
+        if self.iChunkCount > 0:
+            self.cFile.write(self.pChunk[: self.iChunkCount].tobytes())
+            self.iFramesWritten += self.iChunkCount
+            self.iChunkCount = 0
+        self.cFile.flush()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def close(self):
+        """
+        Writes the remaining frames, the frame offset table and the footer and closes the file.
+        """
+        if self.cFile.closed:
+            return
+        self.flush()
+        iIndexOffset = self.cFile.tell()
+        piOffsets = (
+            self.iDataOffset
+            + np.arange(self.iFramesWritten, dtype="<u8") * self.cRecordDtype.itemsize
+        )
+        self.cFile.write(piOffsets.astype("<u8").tobytes())
+        self.cFile.write(INDEX_MAGIC)
+        self.cFile.write(struct.pack("<QQ", self.iFramesWritten, iIndexOffset))
+        self.cFile.close()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# -------------------------------------------------------------------------------------------------------------------- #
+class RecordingReader:
+    """
+    Reads a recording file written by RecordingWriter. Indexing and iteration return EITFrames.
+
+    By default the frame records are memory-mapped: opening a recording only reads the header and offset table, data
+    and timestamp arrays are views into the file and only the sliced frames are read from disk.
+    """
+
+    def __init__(self, sFilePath: str, bMemoryMap: bool = True):
+        """
+        Args:
+            sFilePath: Path of the recording file
+            bMemoryMap: If True, the frame records are memory-mapped, else all frames are read into RAM
+        """
+        self.sFilePath = sFilePath
+        with open(sFilePath, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{sFilePath} is not a sciopy recording.")
+            iVersion, iMetaLen = struct.unpack("<HI", f.read(6))
+            if iVersion > VERSION:
+                raise ValueError(f"Unsupported recording version {iVersion}.")
+            self.dMeta = json.loads(f.read(iMetaLen).decode("utf-8"))
+        iHeaderLen = len(MAGIC) + 6 + iMetaLen
+        self.iDataOffset = -(-iHeaderLen // DATA_ALIGNMENT) * DATA_ALIGNMENT
+
+        self.n_el = self.dMeta["n_el"]
+        self.setup = self.dMeta["setup"]
+        self.cRecordDtype = frame_record_dtype(
+            self.dMeta["num_excitation_settings"],
+            self.dMeta["num_channels"],
+            self.dMeta["num_freq_settings"],
+            self.dMeta["dtype"],
+        )
+        self.piOffsets = self.read_offset_table()
+        if len(self.piOffsets) == 0:
+            self.pRecords = np.zeros((0,), dtype=self.cRecordDtype)
+        elif bMemoryMap:
+            self.pRecords = np.memmap(
+                sFilePath,
+                dtype=self.cRecordDtype,
+                mode="r",
+                offset=self.iDataOffset,
+                shape=(len(self.piOffsets),),
+            )
+        else:
+            self.pRecords = np.fromfile(
+                sFilePath,
+                dtype=self.cRecordDtype,
+                count=len(self.piOffsets),
+                offset=self.iDataOffset,
+            )
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def read_offset_table(self):
+        """
+        Reads the frame offset table. For a recording without footer, the offsets of all complete frame records are
+        derived from the file size.
+        Returns:
+            np.array of the file offset of each frame
+        """
+        iFileSize = os.path.getsize(self.sFilePath)
+        iRecordSize = self.cRecordDtype.itemsize
+        if iFileSize >= self.iDataOffset + FOOTER_LEN:
+            with open(self.sFilePath, "rb") as f:
+                f.seek(iFileSize - FOOTER_LEN)
+                if f.read(len(INDEX_MAGIC)) == INDEX_MAGIC:
+                    iFrames, iIndexOffset = struct.unpack("<QQ", f.read(16))
+                    f.seek(iIndexOffset)
+                    return np.frombuffer(f.read(8 * iFrames), dtype="<u8")
+        iFrames = (iFileSize - self.iDataOffset) // iRecordSize
+        return self.iDataOffset + np.arange(iFrames, dtype=np.uint64) * iRecordSize
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def get_data_as_matrix(self):
+        """
+        Returns:
+            np.array of eit data of shape [Number frames, num injection settings, channels], memory-mapped views are
+            only read from disk where they are sliced
+        """
+        return self.pRecords["data"]
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def get_timestamps(self):
+        """
+        Returns:
+            timestamp1, timestamp2 and timestamp_pc arrays of all frames
+        """
+        return (
+            self.pRecords["timestamp1"],
+            self.pRecords["timestamp2"],
+            self.pRecords["timestamp_pc"],
+        )
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def get_excitation_stgs(self):
+        """
+        Returns:
+            np.array of the excitation settings of shape [Number frames, num injection settings, 2]
+        """
+        return self.pRecords["excitation_stgs"]
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def __len__(self):
+        return len(self.pRecords)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        pRecord = self.pRecords[index]
+        return EITFrame(
+            n_el=self.n_el,
+            excitation_stgs=pRecord["excitation_stgs"],
+            frequency_stgs=pRecord["frequency_stgs"],
+            timestamp1=int_to_timestamp(pRecord["timestamp1"]),
+            timestamp2=float(pRecord["timestamp2"]),
+            timestamp_pc=float(pRecord["timestamp_pc"]),
+            ppcData=pRecord["data"].reshape(-1),
+        )
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def close(self):
+        """
+        Drops the reference to the memory map, the file is unmapped once no returned array refers to it anymore.
+        """
+        self.pRecords = np.zeros((0,), dtype=self.cRecordDtype)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def is_recording(path: str) -> bool:
+    """
+    Checks if path is a sciopy recording file.
+
+    Parameters
+    ----------
+    path : str
+        path to check
+
+    Returns
+    -------
+    bool
+        True, if path is a file starting with the recording magic bytes
+    """
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def find_recording(path: str):
+    """
+    Returns the recording file given by path. path is either a recording file or a directory containing one, e.g. the
+    save path or results folder of a measurement saved with bSaveData="recording".
+
+    Parameters
+    ----------
+    path : str
+        recording file or directory
+
+    Returns
+    -------
+    str or None
+        path of the recording file, None if path is neither a recording file nor a directory with a recording file
+
+    Raises
+    ------
+    ValueError
+        if the directory contains more than one recording file
+    """
+    if not os.path.isdir(path):
+        return path if is_recording(path) else None
+    psFiles = [
+        os.path.join(path, f)
+        for f in sorted(os.listdir(path))
+        if f.endswith(RECORDING_EXTENSION) and is_recording(os.path.join(path, f))
+    ]
+    if len(psFiles) > 1:
+        raise ValueError(
+            f"{path} contains {len(psFiles)} recording files, pass the path of one of them: "
+            + ", ".join(os.path.basename(f) for f in psFiles)
+        )
+    return psFiles[0] if psFiles else None
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def open_recording(sFilePath: str) -> RecordingReader:
+    """
+    Memory-maps a recording file.
+
+    Parameters
+    ----------
+    sFilePath : str
+        path of the recording file
+
+    Returns
+    -------
+    RecordingReader
+        lazily read recording
+    """
+    return RecordingReader(sFilePath, bMemoryMap=True)
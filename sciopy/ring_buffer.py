@@ -0,0 +1,108 @@
+"""Preallocated byte buffer between the USB transport and the message parser"""
+
+import numpy as np
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# -------------------------------------------------------------------------------------------------------------------- #
+class ByteRing:
+    """
+    Preallocated byte buffer the USB transport reads into and the ChunkDecoder consumes complete messages from. The
+    received, not yet consumed bytes are always contiguous, so the decoder works on a view without copying them.
+    When the free space at the end runs out, the remaining bytes (usually less than one message) are moved to the
+    front. The buffer only grows, if a single read needs more space than the whole capacity.
+    """
+
+    def __init__(self, iCapacity: int = 1 << 18):
+        """
+        Args:
+            iCapacity: Initial size of the buffer in bytes
+        """
+        self.pbBuffer = np.empty((max(int(iCapacity), 1),), dtype=np.uint8)
+        self.mvBuffer = memoryview(self.pbBuffer)
+        self.iStart = 0
+        self.iEnd = 0
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def __len__(self):
+        return self.iEnd - self.iStart
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    @property
+    def iCapacity(self):
+        return len(self.pbBuffer)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def reset(self):
+        """
+        Drops all received bytes.
+        """
+        self.iStart = 0
+        self.iEnd = 0
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def reserve(self, iSize: int):
+        """
+        Returns a writable view of iSize free bytes behind the received bytes. The bytes written into it are added
+        with commit.
+        Args:
+            iSize: Number of bytes to be written
+        Returns:
+            memoryview of the free space
+        """
+        if self.iEnd + iSize > len(self.pbBuffer):
+            iLen = self.iEnd - self.iStart
+            if iLen + iSize > len(self.pbBuffer):
+                pbBuffer = np.empty(
+                    (max(2 * self.iCapacity, iLen + iSize),), dtype=np.uint8
+                )
+            else:
+                pbBuffer = self.pbBuffer
+            # Overlapping copies are handled by numpy
+            pbBuffer[:iLen] = self.pbBuffer[self.iStart : self.iEnd]
+            self.pbBuffer = pbBuffer
+            self.mvBuffer = memoryview(pbBuffer)
+            self.iStart = 0
+            self.iEnd = iLen
+        return self.mvBuffer[self.iEnd : self.iEnd + iSize]
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def commit(self, iSize: int):
+        """
+        Adds iSize bytes written into the view returned by reserve.
+        Args:
+            iSize: Number of written bytes
+        """
+        self.iEnd += iSize
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def write(self, buffer):
+        """
+        Copies received bytes into the buffer, for transports which return their own buffers (e.g. pyftdi).
+        Args:
+            buffer: bytes/bytearray/memoryview
+        """
+        iSize = len(buffer)
+        if iSize > 0:
+            self.reserve(iSize)[:] = buffer
+            self.iEnd += iSize
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def view(self):
+        """
+        Returns:
+            memoryview of the received, not yet consumed bytes, valid until the next reserve or write
+        """
+        return self.mvBuffer[self.iStart : self.iEnd]
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def consume(self, iSize: int):
+        """
+        Marks the first iSize received bytes as processed.
+        Args:
+            iSize: Number of processed bytes
+        """
+        self.iStart += iSize
+        if self.iStart >= self.iEnd:
+            self.iStart = 0
+            self.iEnd = 0
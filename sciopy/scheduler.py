@@ -0,0 +1,252 @@
+"""Scheduler for measurement plans of back-to-back EIT measurements"""
+
+import os
+import threading
+import time
+
+from .sciopy_dataclasses import EitMeasurementSetup, MeasurementJob, JobReport
+from .recording import RecordingWriter, new_recording_path
+from .usb_message_parser import save_data_frame
+from .EIT_16_32_64_128 import changed_setup_commands
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# -------------------------------------------------------------------------------------------------------------------- #
+def setup_distance(device_state, commands: list) -> int:
+    """
+    Number of commands needed to change the device from one setup to another.
+    Args:
+        device_state: {name: command} of the current setup, None if unknown
+        commands: List of (name, command) tuples of the new setup, see EIT_16_32_64_128.make_setup_commands
+    Returns:
+        Number of commands to be sent
+    """
+    return len(changed_setup_commands(device_state, commands))
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def save_frames(frames, sSavePath: str, sFormat: str = "npz", setup=None):
+    """
+    Saves all frames of a FrameStore as NPZ files or in one recording file.
+    Args:
+        frames: FrameStore
+        sSavePath: Directory the frames are saved in, created if missing
+        sFormat: "npz": one file per frame, "recording": single recording file
+        setup: EitMeasurementSetup stored in the recording header
+    """
+    sSavePath = os.path.join(sSavePath, "")
+    os.makedirs(sSavePath, exist_ok=True)
+    if sFormat == "recording":
+        with RecordingWriter(
+            new_recording_path(sSavePath),
+            n_el=frames.n_el,
+            iNumExcitationSettings=frames.iNumExcitationSettings,
+            iNumChannels=frames.iNumChannels,
+            iNumFreqSettings=frames.iNumFreqSettings,
+            dtype=frames.dtype,
+            setup=setup,
+        ) as cWriter:
+            for frame in frames:
+                cWriter.write_frame(frame)
+    else:
+        for i, frame in enumerate(frames):
+            save_data_frame(sSavePath, frame, i + 1)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# -------------------------------------------------------------------------------------------------------------------- #
+class MeasurementScheduler:
+    """
+    Runs a measurement plan, a list of MeasurementJobs, on one EIT_16_32_64_128 device.
+
+    The jobs are ordered greedily so that consecutive setups differ in as few device commands as possible, only the
+    changed commands are sent (see EIT_16_32_64_128.setup_delta). The frames of job N are saved by a worker thread
+    while job N+1 is configured and measured. Timing and throughput of each job is reported in a JobReport.
+    """
+
+    def __init__(
+        self,
+        eit,
+        jobs: list = None,
+        reorder: bool = True,
+        save_format: str = "npz",
+        batched: bool = True,
+        keep_data: bool = False,
+    ):
+        """
+        Args:
+            eit: Connected EIT_16_32_64_128 device
+            jobs: List of MeasurementJobs
+            reorder: If True, jobs are reordered to minimise the changed setup parameters, else the given order is kept
+            save_format: "npz": one file per frame, "recording": one recording file per job
+            batched: If True, setup commands are sent batched (see EIT_16_32_64_128.SetMeasurementSetup)
+            keep_data: If True, the frames of saved jobs are kept in the JobReport, frames of jobs without save path
+                are always kept
+        """
+        self.cEIT = eit
+        self.pJobs = list(jobs) if jobs is not None else []
+        self.bReorder = reorder
+        self.sSaveFormat = save_format
+        self.bBatched = batched
+        self.bKeepData = keep_data
+        self.pReports = []
+        self.cSaveThread = None
+        self.cSaveReport = None
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def add_job(
+        self,
+        setup: EitMeasurementSetup,
+        duration: float = 0,
+        save_path: str = None,
+        name: str = "",
+    ):
+        """
+        Appends a job to the measurement plan.
+        Args:
+            setup: EitMeasurementSetup of the job
+            duration: Measurement time in seconds, 0: setup.burst_count frames are measured
+            save_path: Directory the frames are saved in, None: frames are only returned
+            name: Name of the job in the report, defaults to its position in the plan
+        """
+        self.pJobs.append(
+            MeasurementJob(
+                setup=setup,
+                duration=duration,
+                save_path=save_path,
+                name=name or f"job_{len(self.pJobs) + 1}",
+            )
+        )
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def make_job_commands(self):
+        """
+        Builds the setup command sequence of every job once. make_setup_commands limits the amplitude of the setup
+        (with a message), so it is not repeated for planning, the cache delta and sending.
+        Returns:
+            List of the command sequences, in the order of the jobs
+        """
+        return [self.cEIT.make_setup_commands(job.setup) for job in self.pJobs]
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def plan(self, pJobCommands=None):
+        """
+        Orders the jobs greedily: starting from the current device state, the next job is always the one with the
+        fewest commands to be sent. Ties keep the given order.
+        Args:
+            pJobCommands: Command sequences of the jobs from make_job_commands, built if None
+        Returns:
+            List of MeasurementJobs in execution order
+        """
+        if not self.bReorder:
+            return list(self.pJobs)
+        if pJobCommands is None:
+            pJobCommands = self.make_job_commands()
+        pCommands = [[(n, bytes(c)) for n, c in commands] for commands in pJobCommands]
+        dState = self.cEIT.device_state
+        pRemaining = list(range(len(self.pJobs)))
+        pOrder = []
+        while pRemaining:
+            iNext = min(pRemaining, key=lambda i: setup_distance(dState, pCommands[i]))
+            pRemaining.remove(iNext)
+            pOrder.append(iNext)
+            dState = {
+                n: c for n, c in pCommands[iNext] if n != "Reset measurement setup"
+            }
+        return [self.pJobs[i] for i in pOrder]
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def save_job(self, cReport: JobReport, frames, job: MeasurementJob):
+        """
+        Saves the frames of a job in the worker thread and measures the save time. An error is stored in the
+        JobReport, it is reported and raised again by wait_for_saving.
+        """
+        fStart = time.perf_counter()
+        try:
+            save_frames(frames, job.save_path, self.sSaveFormat, job.setup)
+        except Exception as e:
+            cReport.save_error = e
+        cReport.save_time = time.perf_counter() - fStart
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def wait_for_saving(self):
+        """
+        Waits until the frames of the previous job are saved. A failed save is reported and raised again at the end
+        of run, so the following jobs are still measured.
+        """
+        if self.cSaveThread is not None:
+            self.cSaveThread.join()
+            self.cSaveThread = None
+            cReport = self.cSaveReport
+            self.cSaveReport = None
+            if cReport.save_error is not None:
+                print(f"Saving of {cReport.name} failed: {cReport.save_error}")
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def run(self):
+        """
+        Executes the measurement plan.
+        Returns:
+            List of JobReports in execution order
+        Raises:
+            The first error raised while saving the frames of a job, after all jobs were executed
+        """
+        self.pReports = []
+        pJobCommands = self.make_job_commands()
+        dCommands = {id(job): c for job, c in zip(self.pJobs, pJobCommands)}
+        for iPos, job in enumerate(self.plan(pJobCommands)):
+            commands = dCommands[id(job)]
+            cReport = JobReport(name=job.name or f"job_{iPos + 1}", position=iPos)
+
+            fStart = time.perf_counter()
+            cReport.commands_sent = len(self.cEIT.setup_delta(commands))
+            cReport.setup_ok = self.cEIT.SetMeasurementSetup(
+                job.setup, batched=self.bBatched, commands=commands
+            )
+            cReport.setup_time = time.perf_counter() - fStart
+            if not cReport.setup_ok:
+                print(f"Setup of {job.name} failed, job skipped.")
+                self.pReports.append(cReport)
+                continue
+
+            fStart = time.perf_counter()
+            frames = self.cEIT.StartStopMeasurement(
+                timeout=job.duration, return_as="eitframe"
+            )
+            cReport.acquisition_time = time.perf_counter() - fStart
+            cReport.bytes_received = self.cEIT.cMessageParser.get_statistics()["bytes"]
+            if frames is not None:
+                cReport.frames = len(frames)
+                if job.save_path is None or self.bKeepData:
+                    cReport.data = frames
+
+            if frames is not None and job.save_path is not None:
+                # Saving of this job overlaps with the next job, but saving jobs never overlap each other
+                self.wait_for_saving()
+                self.cSaveReport = cReport
+                self.cSaveThread = threading.Thread(
+                    target=self.save_job, args=(cReport, frames, job), daemon=True
+                )
+                self.cSaveThread.start()
+            self.pReports.append(cReport)
+        self.wait_for_saving()
+        for cReport in self.pReports:
+            if cReport.save_error is not None:
+                # The reports of all jobs stay available in self.pReports
+                raise cReport.save_error
+        return self.pReports
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def print_report(self):
+        """
+        Prints timing and throughput of the executed jobs.
+        """
+        print(
+            f"{'job':<20} {'cmds':>5} {'frames':>7} {'setup s':>9} {'acq s':>9} {'save s':>9} "
+            f"{'frames/s':>9} {'MB/s':>8}"
+        )
+        for r in self.pReports:
+            print(
+                f"{r.name:<20} {r.commands_sent:>5} {r.frames:>7} {r.setup_time:>9.3f} {r.acquisition_time:>9.3f} "
+                f"{r.save_time:>9.3f} {r.frames_per_s:>9.2f} {r.mb_per_s:>8.3f}"
+            )
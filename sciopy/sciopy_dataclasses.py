@@ -2,6 +2,7 @@
 
 from dataclasses import dataclass
 from typing import List, Tuple, Union
+import numpy as np
 import numpy.typing as npt
 
 
@@ -143,6 +144,94 @@ class SingleFrame:
     end_tag: str
 
 
+class CompactSingleFrame:
+    """
+    Slotted, array backed variant of SingleFrame with a fraction of its memory use. The 16 channels are a row of a
+    complex64 array, usually shared by all frames of a burst, the tags are kept as integers.
+
+    The attributes of SingleFrame stay available: ch_1 ... ch_16 return the channel values as complex, channels
+    returns all 16 at once. Different from SingleFrame, start_tag and end_tag are integers (0xB4 instead of 'b4')
+    and frequency_row is the row number instead of its two hexadecimal bytes.
+
+    Parameters
+    ----------
+    start_tag : int
+        has to be 0xB4
+    channel_group : int
+        channel group: CG=1 -> Channels 1-16, CG=2 -> Channels 17-32 up to CG=4
+    excitation_stgs : List[int]
+        excitation setting: [ESout, ESin]
+    frequency_row : int
+        frequency row
+    timestamp : int
+        milli seconds
+    channels : np.ndarray
+        complex64 values of the 16 channels, or array of shape [frames, 16] together with index
+    end_tag : int
+        has to be 0xB4
+    index : int
+        row of this frame in channels, None if channels holds only this frame
+    """
+
+    __slots__ = (
+        "start_tag",
+        "channel_group",
+        "es_out",
+        "es_in",
+        "frequency_row",
+        "timestamp",
+        "end_tag",
+        "_channels",
+        "_index",
+    )
+
+    def __init__(
+        self,
+        start_tag: int,
+        channel_group: int,
+        excitation_stgs: List[int],
+        frequency_row: int,
+        timestamp: int,
+        channels: npt.NDArray[complex],
+        end_tag: int,
+        index: int = None,
+    ):
+        self.start_tag = start_tag
+        self.channel_group = channel_group
+        self.es_out, self.es_in = (int(es) for es in excitation_stgs)
+        self.frequency_row = frequency_row
+        self.timestamp = timestamp
+        self.end_tag = end_tag
+        if index is None:
+            channels = np.asarray(channels, dtype=np.complex64).reshape(1, 16)
+            index = 0
+        self._channels = channels
+        self._index = index
+
+    @property
+    def excitation_stgs(self) -> npt.NDArray[int]:
+        return np.array([self.es_out, self.es_in])
+
+    @property
+    def channels(self) -> npt.NDArray[complex]:
+        return self._channels[self._index]
+
+    def __getattr__(self, name):
+        # Only called for attributes not found otherwise: ch_1 ... ch_16
+        if name.startswith("ch_") and name[3:].isdigit() and 1 <= int(name[3:]) <= 16:
+            return complex(self._channels[self._index, int(name[3:]) - 1])
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{name}'"
+        )
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(channel_group={self.channel_group}, "
+            f"excitation_stgs=[{self.es_out}, {self.es_in}], frequency_row={self.frequency_row}, "
+            f"timestamp={self.timestamp})"
+        )
+
+
 @dataclass
 class ScioSpecMeasurementConfig:
     """
@@ -243,3 +332,93 @@ class EITFrame:
     timestamp2: int
     timestamp_pc: int
     ppcData: npt.NDArray[complex]  # Channels 1-(64) all channel groups combined
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+@dataclass
+class DataBlock:
+    """
+    Column wise storage of all data messages (0xB4) decoded from one USB buffer.
+    Defined by Sciospec:"EIT -16,32,64,128", Chapter 5.4.1
+
+    Parameters
+    ----------
+    channel_group : np.array [N] channel group of each message, CG=1 -> Channels 1-16, ...
+    excitation_stgs : np.array [N x 2] [ESout, ESin] injection electrodes of each message
+    frequency_row : np.array [N] row in the frequency stack of each message
+    timestamp : np.array [N x 4] raw timestamp bytes of each message, MSB first
+    data : np.array [N x 16] complex measured data of the 16 channels of each message
+    """
+
+    channel_group: npt.NDArray[int]
+    excitation_stgs: npt.NDArray[int]
+    frequency_row: npt.NDArray[int]
+    timestamp: npt.NDArray[int]
+    data: npt.NDArray[complex]
+
+    def __len__(self):
+        return len(self.channel_group)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+@dataclass
+class MeasurementJob:
+    """
+    One job of a measurement plan, see sciopy.scheduler.MeasurementScheduler.
+
+    Parameters
+    ----------
+    setup : EitMeasurementSetup to be applied before the measurement
+    duration : float, measurement time in seconds, 0: setup.burst_count frames are measured
+    save_path : str, directory the frames are saved in, None: frames are only returned
+    name : str, name of the job in the report
+    """
+
+    setup: EitMeasurementSetup
+    duration: float = 0
+    save_path: Union[str, None] = None
+    name: str = ""
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+@dataclass
+class JobReport:
+    """
+    Timing and throughput of an executed MeasurementJob.
+
+    Parameters
+    ----------
+    name : str, name of the job
+    position : int, index of the job in the executed order
+    commands_sent : int, number of setup commands sent to the device
+    setup_ok : bool, if all setup commands were acknowledged
+    frames : int, number of received frames
+    bytes_received : int, number of bytes read from the device during the measurement
+    setup_time : float, time in seconds to configure the device
+    acquisition_time : float, time in seconds of the measurement
+    save_time : float, time in seconds to save the frames (overlapping with the next job)
+    data : FrameStore of the received frames, None if the frames were not kept
+    save_error : Exception raised while saving the frames, None if they were saved
+    """
+
+    name: str
+    position: int
+    commands_sent: int = 0
+    setup_ok: bool = False
+    frames: int = 0
+    bytes_received: int = 0
+    setup_time: float = 0.0
+    acquisition_time: float = 0.0
+    save_time: float = 0.0
+    data: object = None
+    save_error: object = None
+
+    @property
+    def frames_per_s(self):
+        return self.frames / self.acquisition_time if self.acquisition_time > 0 else 0.0
+
+    @property
+    def mb_per_s(self):
+        if self.acquisition_time <= 0:
+            return 0.0
+        return self.bytes_received / self.acquisition_time / 1e6
@@ -0,0 +1,335 @@
+"""Simulated Sciospec EIT device for hardware-free acquisition and throughput tests"""
+
+import struct
+import threading
+import time
+
+import numpy as np
+
+from .datatype_conversion import DATA_MESSAGE_DTYPE
+
+ACK_OK = 0x83
+NACK_NOT_EXECUTED = 0x81
+NACK_NOT_RECOGNIZED = 0x82
+
+# Command tags known by the device, see Sciospec:"EIT -16,32,64,128", Chapter 5
+KNOWN_COMMANDS = [0x90, 0xA1, 0xB0, 0xB1, 0xB2, 0xB3, 0xB4, 0xB5, 0xD0, 0xD1, 0xD2]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# -------------------------------------------------------------------------------------------------------------------- #
+class SimulatedDevice:
+    """
+    Stand-in for a Sciospec EIT 16/32/64/128 device. It offers the read/write interface of a serial.Serial (FS) and
+    the read_data_bytes/write_data interface of a pyftdi Ftdi device (HS), so it can be passed to the MessageParser or
+    set as device of EIT_16_32_64_128 via connect_device_simulated().
+
+    Every command written to the device is answered with an acknowledgement [0x18, 0x01, 0x83, 0x18], malformed or
+    unknown commands with a not-acknowledge. The measurement setup commands for burst count, framerate and excitation
+    sequence are evaluated. After the start command [B4 01 01 B4] correctly formatted data messages are streamed for
+    all excitation settings and channel groups, frame by frame with the configured framerate. Streaming ends after
+    burst_count frames (burst count 0: until the stop command [B4 01 00 B4]).
+    """
+
+    def __init__(
+        self,
+        n_el: int = 16,
+        framerate: float = 10,
+        noise: float = 0.01,
+        burst_count: int = 0,
+        realtime: bool = True,
+        timeout: float = 1,
+        seed=None,
+    ):
+        """
+        Args:
+            n_el: Number of electrodes, 16, 32, 48, 64 or 128, determines the number of channel groups sent
+            framerate: Frames per second, until set by the framerate command of the measurement setup
+            noise: Standard deviation of the gaussian noise added to the real and imaginary part of each channel
+            burst_count: Number of frames per measurement until set by the burst count command, 0 is continuous
+            realtime: If True, frames are released with the framerate, otherwise all frames are available at once
+            timeout: Time in seconds a read waits for data, like the timeout of serial.Serial (FS) or the read attempts
+                of pyftdi (HS)
+            seed: Seed of the noise generator
+        """
+        if n_el % 16 != 0 or not 16 <= n_el <= 128:
+            raise ValueError(
+                f"Unallowed value: {n_el}. Please set 16, 32, 48, 64 or 128 electrode mode."
+            )
+        self.name = "SimulatedDevice"
+        self.n_el = n_el
+        self.iNumChannelGroups = n_el // 16
+        self.fFrameRate = framerate
+        self.fNoise = noise
+        self.iBurstCount = burst_count
+        self.bRealtime = realtime
+        self.timeout = timeout
+        self.cRandom = np.random.default_rng(seed)
+
+        self.cLock = threading.Lock()
+        self.bOpen = True
+        self.bInput = bytearray()  # Commands written to the device, not yet complete
+        self.bOutput = bytearray()  # Bytes waiting to be read
+        self.ppiCommands = []  # Log of all received commands
+        self.reset_setup()
+
+        # Measurement state
+        self.bMeasuring = False
+        self.fStartTime = 0
+        self.iFramesSent = 0
+        self.ppcBaseData = self.make_base_data()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def reset_setup(self):
+        """
+        Resets the excitation sequence like the reset measurement setup command [B0 01 01 B0].
+        """
+        self.piExcitationPairs = []
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def get_excitation_pairs(self):
+        """
+        Returns:
+            Array [Num excitation settings x 2] of [ESout, ESin], adjacent injection if no sequence was set
+        """
+        if len(self.piExcitationPairs) > 0:
+            return np.array(self.piExcitationPairs, dtype=np.uint8)
+        piOut = np.arange(1, self.n_el + 1)
+        return np.stack([piOut, np.roll(piOut, -1)], axis=1).astype(np.uint8)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def make_base_data(self):
+        """
+        Noise free measurement of a homogeneous phantom: a smooth potential distribution around each injection.
+        Returns:
+            Complex array [Num excitation settings x n_el]
+        """
+        piPairs = self.get_excitation_pairs().astype(int) - 1
+        piChannels = np.arange(self.n_el)
+        fAngle = 2 * np.pi * (piChannels[None, :] - piPairs[:, :1]) / self.n_el
+        return (np.cos(fAngle) + 0.1j * np.sin(fAngle)).astype(np.complex64)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def make_frame(self, iFrame: int):
+        """
+        Builds all data messages of one frame.
+        Args:
+            iFrame: Index of the frame since measurement start
+        Returns:
+            Bytes of all data messages of the frame
+        """
+        piPairs = self.get_excitation_pairs()
+        iNumExc = len(piPairs)
+        pcData = self.ppcBaseData
+        if pcData.shape[0] != iNumExc:
+            pcData = self.ppcBaseData = self.make_base_data()
+        if self.fNoise > 0:
+            pcData = pcData + self.fNoise * (
+                self.cRandom.standard_normal(pcData.shape)
+                + 1j * self.cRandom.standard_normal(pcData.shape)
+            )
+
+        iMessages = iNumExc * self.iNumChannelGroups
+        pMessages = np.zeros(iMessages, dtype=DATA_MESSAGE_DTYPE)
+        pMessages["start_tag"] = 0xB4
+        pMessages["length"] = 137
+        pMessages["end_tag"] = 0xB4
+        pMessages["channel_group"] = np.tile(
+            np.arange(1, self.iNumChannelGroups + 1), iNumExc
+        )
+        pMessages["excitation_stgs"] = np.repeat(piPairs, self.iNumChannelGroups, 0)
+        pMessages["frequency_row"] = 1
+        # Timestamp in ms since measurement start, spread over the frame period
+        fPeriod = 1000.0 / self.fFrameRate
+        pMessages["timestamp"] = (
+            iFrame * fPeriod + np.arange(iMessages) * fPeriod / iMessages
+        ).astype(np.uint32)
+        pcData = pcData.reshape(iMessages, 16)
+        pMessages["data"][:, :, 0] = pcData.real
+        pMessages["data"][:, :, 1] = pcData.imag
+        return pMessages.tobytes()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def ack(self, iCode: int = ACK_OK):
+        self.bOutput += bytes([0x18, 0x01, iCode, 0x18])
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def handle_command(self, piCommand: bytes):
+        """
+        Executes one complete command and queues the answer.
+        Args:
+            piCommand: [CT][LEN][data...][CT]
+        """
+        self.ppiCommands.append(bytes(piCommand))
+        iTag = piCommand[0]
+        pData = piCommand[2:-1]
+        if piCommand[-1] != iTag or iTag not in KNOWN_COMMANDS:
+            self.ack(NACK_NOT_RECOGNIZED)
+            return
+
+        if iTag == 0xB4:
+            if len(pData) == 1 and pData[0] == 0x01:
+                self.ack()
+                self.start_measurement()
+                return
+            if len(pData) == 1 and pData[0] == 0x00:
+                self.stop_measurement()
+                self.ack()
+                return
+            self.ack(NACK_NOT_EXECUTED)
+            return
+        if iTag == 0xA1:
+            self.stop_measurement()
+            self.reset_setup()
+        elif iTag == 0xB0 and len(pData) > 0:
+            if pData[0] == 0x01:
+                self.reset_setup()
+            elif pData[0] == 0x02 and len(pData) == 3:
+                self.iBurstCount = (pData[1] << 8) | pData[2]
+            elif pData[0] == 0x03 and len(pData) == 5:
+                fFrameRate = struct.unpack(">f", bytes(pData[1:5]))[0]
+                if fFrameRate <= 0:
+                    self.ack(NACK_NOT_EXECUTED)
+                    return
+                self.fFrameRate = fFrameRate
+            elif pData[0] == 0x06 and len(pData) == 3:
+                self.piExcitationPairs.append([pData[1], pData[2]])
+        self.ack()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def start_measurement(self):
+        self.bMeasuring = True
+        self.fStartTime = time.perf_counter()
+        self.iFramesSent = 0
+        self.ppcBaseData = self.make_base_data()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def stop_measurement(self):
+        """
+        Stops streaming, frames which are due are still sent before the acknowledgement of the stop command.
+        """
+        if self.bMeasuring:
+            self.update_stream()
+        self.bMeasuring = False
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def update_stream(self):
+        """
+        Appends all frames which are due since measurement start to the output buffer.
+        """
+        if not self.bMeasuring:
+            return
+        if self.bRealtime:
+            fElapsed = time.perf_counter() - self.fStartTime
+            iDue = int(fElapsed * self.fFrameRate) + 1
+        else:
+            iDue = self.iBurstCount if self.iBurstCount > 0 else self.iFramesSent + 1
+        if self.iBurstCount > 0:
+            iDue = min(iDue, self.iBurstCount)
+        while self.iFramesSent < iDue:
+            self.bOutput += self.make_frame(self.iFramesSent)
+            self.iFramesSent += 1
+        if 0 < self.iBurstCount <= self.iFramesSent:
+            self.bMeasuring = False
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def write(self, data):
+        """
+        FS interface: writes a command (or parts of it) to the device.
+        Args:
+            data: bytes/bytearray/list of integers
+        Returns:
+            Number of written bytes
+        """
+        with self.cLock:
+            self.bInput += bytes(data)
+            while len(self.bInput) >= 3:
+                iEnd = self.bInput[1] + 3
+                if len(self.bInput) < iEnd:
+                    break
+                self.handle_command(self.bInput[:iEnd])
+                del self.bInput[:iEnd]
+        return len(data)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def take_output(self, size: int):
+        with self.cLock:
+            self.update_stream()
+            buffer = bytes(self.bOutput[:size])
+            del self.bOutput[:size]
+        return buffer
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    @property
+    def in_waiting(self):
+        with self.cLock:
+            self.update_stream()
+            return len(self.bOutput)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def read(self, size: int = 1):
+        """
+        FS interface: reads up to size bytes, waits at most timeout seconds for the first byte.
+        Args:
+            size: Maximal number of bytes
+        Returns:
+            bytes, empty on timeout
+        """
+        return self.wait_output(size)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def readinto(self, buffer):
+        """
+        FS interface: reads up to len(buffer) bytes into buffer, like serial.Serial.readinto.
+        Args:
+            buffer: Writable buffer, e.g. memoryview
+        Returns:
+            Number of bytes read, 0 on timeout
+        """
+        data = self.wait_output(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def wait_output(self, size: int):
+        fEnd = time.perf_counter() + (self.timeout or 0)
+        while True:
+            buffer = self.take_output(size)
+            if buffer or time.perf_counter() >= fEnd:
+                return buffer
+            time.sleep(0.001)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def write_data(self, data):
+        """
+        HS interface: writes a command to the device.
+        """
+        return self.write(data)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def read_data_bytes(self, size: int = 1024, attempt: int = 1):
+        """
+        HS interface: reads up to size bytes, waits at most timeout seconds for the first byte. With a single
+        attempt, only the bytes available right now are returned.
+        Returns:
+            bytearray, empty on timeout
+        """
+        if attempt <= 1:
+            return bytearray(self.take_output(size))
+        return bytearray(self.wait_output(size))
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def purge_buffers(self):
+        with self.cLock:
+            self.bInput.clear()
+            self.bOutput.clear()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def reset_input_buffer(self):
+        with self.cLock:
+            self.bOutput.clear()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def close(self):
+        self.bOpen = False
+        self.bMeasuring = False
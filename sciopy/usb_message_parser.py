@@ -8,6 +8,10 @@ Date ：17.11.2025 09:04
 
 import numpy as np
 import time
+import threading
+import queue
+from collections import deque
+from contextlib import nullcontext
 
 from dataclasses import dataclass
 from typing import List, Tuple, Union
@@ -15,12 +19,29 @@ import numpy.typing as npt
 import os
 from pandas.core.interchange import dataframe
 import struct
-from .sciopy_dataclasses import EitMeasurementSetup, EITFrame
+from .sciopy_dataclasses import EitMeasurementSetup, EITFrame, DataBlock
 from .com_util import bytesarray_to_float, byteintarray_to_float, two_byte_to_int
+from .frame_store import FrameStore
+from .ring_buffer import ByteRing
+from .recording import (
+    RecordingWriter,
+    RecordingReader,
+    new_recording_path,
+    find_recording,
+    open_recording,
+)
 from datetime import datetime
 
 # -------------------------------------------------------------------------------------------------------------------- #
 # -------------------------------------------------------------------------------------------------------------------- #
+DATA_TAG = 0xB4  # Command Tag of measured data
+DATA_MESSAGE_LEN = 140  # [CT] [LEN] [CG] [ES ES] [FR FR] [TS TS TS TS] [16x Re Im] [CT]
+ACK_TAG = 0x18  # Command Tag of acknowledge messages [0x18, 0x01, code, 0x18]
+ACK_OK = 0x83
+ACK_HOLDUP = 0x92  # Data holdup, the device could not send its data in time
+# Acknowledge codes answering a command, the other codes are sent unsolicited (e.g. 0x92 data holdup)
+COMMAND_REPLY_CODES = [0x02, 0x81, 0x82, 0x83]
+
 msg_dict = {
     "0x01": "No message inside the message buffer",
     "0x02": "Timeout: Communication-timeout (less data than expected)",
@@ -35,10 +56,12 @@ msg_dict = {
 
 
 # -------------------------------------------------------------------------------------------------------------------- #
-def byte_parser():
+def byte_parser(cStats=None):
     """
     Generator to parse each input byte by byte
 
+    Args:
+        cStats: AcquisitionStats, counting incomplete messages
     Returns:
         Empty lists, while message is incomplete, else full usb-message as list [int[hex-format], int [hex-format], ..]
     """
@@ -62,8 +85,10 @@ def byte_parser():
             data = yield []
 
         if fMesstype != data:  # Last Byte != Message Type
+            if cStats is not None:
+                cStats.iMismatchedMessages += 1
             print(
-                f"Current message not complete for Starting messagetype {hex(fMesstype)} and ending type {hex(data[0])}"
+                f"Current message not complete for Starting messagetype {hex(fMesstype[0])} and ending type {hex(data[0])}"
             )
         piCurrMess.extend(data)
         iCurrLen = 0
@@ -71,6 +96,310 @@ def byte_parser():
         piCurrMess = []
 
 
+# -------------------------------------------------------------------------------------------------------------------- #
+class ChunkDecoder:
+    """
+    Parses whole byte buffers from an Sciospec EIT Device. Message boundaries are located per buffer and the channel
+    payloads of all data messages (0xB4) are decoded at once into complex arrays. Bytes of a message that is not
+    complete at the end of a buffer are kept until the next buffer arrives.
+
+    Received bytes are collected in a ByteRing. Transports can read directly into it (see MessageParser.receive),
+    messages are then decoded from views of the ring without copying the received bytes.
+    """
+
+    def __init__(self):
+        self.cRing = ByteRing()
+        # Messages, where start and end tag did not match, and bytes skipped to find the next message boundary
+        self.iMismatchCount = 0
+        self.iSkippedBytes = 0
+        self.bResyncing = False
+        self.cEmptyBlock = decode_data_messages(b"", np.zeros((0,), dtype=int))
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def reset(self):
+        """
+        Drops all bytes of a not yet completed message
+        """
+        self.cRing.reset()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    @property
+    def bMessageStarted(self):
+        """
+        True, if bytes of an incomplete message are waiting for the next buffer
+        """
+        return len(self.cRing) > 0
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def locate_messages(self, buffer):
+        """
+        Locates the message boundaries within the buffer. Consecutive data messages are checked block wise, all other
+        messages are walked message by message.
+        Args:
+            buffer: bytes/memoryview to be searched, starting at a message boundary
+        Returns:
+            (np.array of start indices of data messages, list of other messages as lists of integers, index of the
+            first byte not belonging to a complete message)
+        """
+        piRaw = np.frombuffer(buffer, dtype=np.uint8)
+        iLen = len(buffer)
+        piDataOffsets = []
+        ppiOther = []
+        iPos = 0
+        while iPos + 1 < iLen:
+            # Run of consecutive data messages
+            iRun = (iLen - iPos) // DATA_MESSAGE_LEN
+            if iRun > 0 and buffer[iPos] == DATA_TAG:
+                piBlock = piRaw[iPos : iPos + iRun * DATA_MESSAGE_LEN].reshape(
+                    iRun, DATA_MESSAGE_LEN
+                )
+                pbValid = (
+                    (piBlock[:, 0] == DATA_TAG)
+                    & (piBlock[:, 1] == DATA_MESSAGE_LEN - 3)
+                    & (piBlock[:, -1] == DATA_TAG)
+                )
+                iValid = iRun if pbValid.all() else int(np.argmin(pbValid))
+                if iValid > 0:
+                    self.bResyncing = False
+                    piDataOffsets.append(
+                        np.arange(
+                            iPos, iPos + iValid * DATA_MESSAGE_LEN, DATA_MESSAGE_LEN
+                        )
+                    )
+                    iPos += iValid * DATA_MESSAGE_LEN
+                    continue
+
+            # Single message: [Command Tag, Message Length, Message Info, Command Tag]
+            iEnd = iPos + buffer[iPos + 1] + 3
+            if iEnd > iLen:
+                break  # Message not complete
+            if buffer[iEnd - 1] != buffer[iPos] or buffer[iPos] == DATA_TAG:
+                # Tags do not match or data message of wrong length, search next boundary
+                if not self.bResyncing:
+                    self.iMismatchCount += 1
+                    self.bResyncing = True
+                self.iSkippedBytes += 1
+                iPos += 1
+                continue
+            self.bResyncing = False
+            ppiOther.append(list(buffer[iPos:iEnd]))
+            iPos = iEnd
+
+        if len(piDataOffsets) > 0:
+            piDataOffsets = np.concatenate(piDataOffsets)
+        else:
+            piDataOffsets = np.zeros((0,), dtype=int)
+        return piDataOffsets, ppiOther, iPos
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def decode(self, buffer):
+        """
+        Decodes a whole buffer of received bytes.
+        Args:
+            buffer: bytes/bytearray read from USB
+        Returns:
+            (DataBlock of all complete data messages, list of all other complete messages as lists of integers)
+        """
+        self.cRing.write(buffer)
+        return self.decode_received()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def decode_received(self):
+        """
+        Decodes all complete messages already in the ring, e.g. read into it by the transport. The bytes of an
+        incomplete message at the end stay in the ring.
+        Returns:
+            (DataBlock of all complete data messages, list of all other complete messages as lists of integers)
+        """
+        buffer = self.cRing.view()
+        if len(buffer) < 2 or buffer[1] + 3 > len(buffer):
+            # Not even the first message is complete
+            return self.cEmptyBlock, []
+        piDataOffsets, ppiOther, iPos = self.locate_messages(buffer)
+        cBlock = decode_data_messages(buffer, piDataOffsets)
+        self.cRing.consume(iPos)
+        return cBlock, ppiOther
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def decode_data_messages(buffer, piOffsets) -> DataBlock:
+    """
+    Decodes all data messages (0xB4) of a buffer at once.
+    Args:
+        buffer: bytes containing the data messages
+        piOffsets: start index of each data message within buffer
+    Returns:
+        DataBlock with one entry per data message
+    """
+    piRaw = np.frombuffer(buffer, dtype=np.uint8)
+    piMessages = piRaw[piOffsets[:, None] + np.arange(DATA_MESSAGE_LEN)]
+    # 16 pairs of big endian float32 (real, imag) -> native complex64
+    pcData = (
+        np.ascontiguousarray(piMessages[:, 11:139])
+        .view(">f4")
+        .astype(np.float32)
+        .view(np.complex64)
+    )
+    return DataBlock(
+        channel_group=piMessages[:, 2],
+        excitation_stgs=piMessages[:, 3:5],
+        frequency_row=piMessages[:, 5].astype(int) * 256 + piMessages[:, 6],
+        timestamp=piMessages[:, 7:11],
+        data=pcData,
+    )
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# -------------------------------------------------------------------------------------------------------------------- #
+class AcquisitionStats:
+    """
+    Counters and per stage times (read, parse, interpret, save) of the USB acquisition of a MessageParser.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def reset(self):
+        """
+        Resets all counters and the start time of the rate calculation.
+        """
+        self.fStartTime = time.perf_counter()
+        self.iReadCalls = 0
+        self.iEmptyReads = 0
+        self.iBytes = 0
+        self.iMessages = 0
+        self.iDataMessages = 0
+        self.iFrames = 0
+        self.iFramesSaved = 0
+        self.iMismatchedMessages = 0  # Start and end tag of a message did not match
+        self.iSkippedChannelGroupMessages = 0  # Channel groups above the setup
+        self.iHoldups = 0  # Data holdup messages [18 01 92 18] of the device
+        self.dStageTime = {"read": 0.0, "parse": 0.0, "interpret": 0.0, "save": 0.0}
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def get_report(self):
+        """
+        Returns:
+            Dictionary of all counters, the rates per second since the last reset and the time spent per stage
+        """
+        fElapsed = max(time.perf_counter() - self.fStartTime, 1e-9)
+        return {
+            "elapsed_s": fElapsed,
+            "bytes": self.iBytes,
+            "bytes_per_s": self.iBytes / fElapsed,
+            "messages": self.iMessages,
+            "messages_per_s": self.iMessages / fElapsed,
+            "data_messages": self.iDataMessages,
+            "frames": self.iFrames,
+            "frames_per_s": self.iFrames / fElapsed,
+            "frames_saved": self.iFramesSaved,
+            "mismatched_messages": self.iMismatchedMessages,
+            "skipped_channel_group_messages": self.iSkippedChannelGroupMessages,
+            "holdups": self.iHoldups,
+            "read_calls": self.iReadCalls,
+            "empty_reads": self.iEmptyReads,
+            "stage_time_s": dict(self.dStageTime),
+        }
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def print_report(self):
+        """
+        Prints a short summary of the acquisition.
+        """
+        dReport = self.get_report()
+        print(
+            f"{dReport['bytes']} byte(s) in {dReport['elapsed_s']:.2f} s ({dReport['bytes_per_s'] / 1e6:.3f} MB/s), "
+            f"{dReport['messages']} message(s) ({dReport['messages_per_s']:.1f}/s), "
+            f"{dReport['frames']} frame(s) ({dReport['frames_per_s']:.2f}/s)"
+        )
+        print(
+            f"Mismatched messages: {dReport['mismatched_messages']}, "
+            f"skipped channel group messages: {dReport['skipped_channel_group_messages']}, "
+            f"holdups: {dReport['holdups']}"
+        )
+        print(
+            "Stage times: "
+            + ", ".join(f"{k} {v:.3f} s" for k, v in dReport["stage_time_s"].items())
+        )
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# -------------------------------------------------------------------------------------------------------------------- #
+class LowLatencyReader:
+    """
+    Event driven read strategy of a MessageParser, used instead of sleeping a fixed time after an empty read.
+    Bytes already received are returned at once. Otherwise serial (FS) devices block in a read of the first byte with
+    a short read timeout fMaxWait, so the read returns as soon as data arrives. Devices without such a timeout (HS)
+    are polled with an adaptive backoff: the wait starts at fMinWait and doubles with every empty read up to fMaxWait.
+    Use as context manager, the serial read timeout is restored on exit.
+    """
+
+    def __init__(self, cParser, fMaxWait: float, fMinWait: float = 0.0005):
+        """
+        Args:
+            cParser: MessageParser whose device is read
+            fMaxWait: Maximal time in seconds a single read waits for data
+            fMinWait: First backoff time in seconds after an empty read (HS)
+        """
+        self.cParser = cParser
+        self.fMaxWait = max(fMaxWait, fMinWait)
+        self.fMinWait = fMinWait
+        self.fWait = fMinWait
+        self.bBlocking = cParser.sDevicetype == "FS" and hasattr(
+            cParser.cDevice, "timeout"
+        )
+        self.fDeviceTimeout = None
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def __enter__(self):
+        if self.bBlocking:
+            self.fDeviceTimeout = self.cParser.cDevice.timeout
+            self.cParser.cDevice.timeout = self.fMaxWait
+        return self
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def __exit__(self, *args):
+        if self.bBlocking:
+            self.cParser.cDevice.timeout = self.fDeviceTimeout
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def read(self):
+        """
+        Returns:
+            Byte(s) read from USB, empty if nothing arrived within the current wait time
+        """
+        buffer = self.cParser.read_available()
+        if buffer:
+            self.fWait = self.fMinWait
+            return buffer
+        if self.bBlocking:
+            buffer = self.cParser.cDevice.read(1)
+            if buffer:
+                buffer += self.cParser.read_available()
+            return buffer
+        time.sleep(self.fWait)
+        self.fWait = min(2 * self.fWait, self.fMaxWait)
+        return buffer
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def read_into(self, cRing: ByteRing):
+        """
+        Same as read, but the bytes are read into cRing, see MessageParser.read_into.
+        Returns:
+            Number of bytes read, 0 if nothing arrived within the current wait time
+        """
+        iRead = self.cParser.read_into(cRing, bWait=False)
+        if iRead > 0:
+            self.fWait = self.fMinWait
+            return iRead
+        if self.bBlocking:
+            return self.cParser.read_into(cRing, bWait=True)
+        time.sleep(self.fWait)
+        self.fWait = min(2 * self.fWait, self.fMaxWait)
+        return 0
+
+
 # -------------------------------------------------------------------------------------------------------------------- #
 # -------------------------------------------------------------------------------------------------------------------- #
 class MessageParser:
@@ -78,23 +407,59 @@ class MessageParser:
     Parses byte wise USB messages from an Sciospec EIT Device and sorts them according to the message type
     """
 
-    def __init__(self, device, eitsetup=None, devicetype="FS"):
+    def __init__(
+        self,
+        device,
+        eitsetup=None,
+        devicetype="FS",
+        engine="byte",
+        bulk_read=False,
+        block_size=4096,
+        dtype=np.complex64,
+        hs_read_size=1024,
+        hs_max_read_size=65536,
+        hs_read_attempts=150,
+    ):
         # General setup
         self.bPrintMessages = False
+        # Complex data type of the measured data, the device sends single precision
+        self.dtype = np.dtype(dtype)
         self.iNPZSaveIndex = 1
+        self.cRecordingWriter = None
+        self.sRecordingPath = None
+        self.cAsyncWriter = None
         self.iSaveCounter = 0  # Unused
         self.ppcData = []
         self.iInjIndex = 0
+        # Acknowledge codes of sent commands, in order of arrival
+        self.piCommandReplies = []
+        # Called with each completed frame before it is stored or deleted
+        self.cFrameCallback = None
+        # End of data: no data for iEndOfDataFrames frame periods plus fEndOfDataMargin seconds
+        self.iEndOfDataFrames = 3
+        self.fEndOfDataMargin = 0.1
 
         # Device setup
         self.cDevice = device
         self.sDevicetype = devicetype
+        self.bBulkRead = bulk_read  # FS: read all waiting bytes per call
+        self.iBlockSize = block_size  # FS: maximal number of bytes per bulk read
+        # HS: requested bytes per read, adapted between hs_read_size and hs_max_read_size (see adapt_hs_read_size)
+        self.iHSMinReadSize = hs_read_size
+        self.iHSMaxReadSize = max(hs_max_read_size, hs_read_size)
+        self.iHSReadSize = hs_read_size
+        self.iHSReadAttempts = hs_read_attempts
         if self.sDevicetype == "FS":
             self.device_send = self.send_fs
             self.device_read = self.read_fs
         elif self.sDevicetype == "HS":
             self.device_send = self.send_hs
             self.device_read = self.read_hs
+
+        # Parser setup: "byte" feeds the byte_parser generator, "chunk" decodes whole buffers with the ChunkDecoder
+        self.cStats = AcquisitionStats()
+        self.sEngine = engine
+        self.bMessageStarted = False
         self.init_parser()
 
         # Setup related changes
@@ -132,52 +497,267 @@ class MessageParser:
             )
 
             # ALL needed
+            self.ppcData = self.new_frame_store()
             self.reset_new_data_frame()
 
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def new_frame_store(self):
+        """
+        Creates an empty FrameStore matching the current setup. For a given burst count, memory for all frames is
+        allocated beforehand.
+        Returns:
+            FrameStore
+        """
+        return FrameStore(
+            n_el=self.setup.n_el,
+            iNumExcitationSettings=self.iNumExcitationSettings,
+            iNumChannels=self.iMaxChannelGroups * 16,
+            iNumFreqSettings=self.iNumFreqSettings,
+            iCapacity=max(self.setup.burst_count, 16),
+            dtype=self.dtype,
+        )
+
     # ---------------------------------------------------------------------------------------------------------------- #
     def reset_new_data_frame(self):
         """
-        Resets the Current EITFrame.
+        Resets the Current EITFrame. The frame is the next free slot of the FrameStore and is filled in place.
         """
         self.iInjIndex = 0
         self.iSaveCounter = 0
-        self.CurrentFrame = EITFrame(
-            n_el=self.setup.n_el,
-            excitation_stgs=np.zeros((self.iNumExcitationSettings, 2), dtype=int),
-            frequency_stgs=np.zeros((self.iNumFreqSettings,), dtype=int),
-            # todo fill in setup freq settings
-            timestamp1=0,
-            timestamp2=0,
-            timestamp_pc=0,
-            ppcData=np.zeros(
-                self.iMaxChannelGroups * 16 * self.iNumExcitationSettings, dtype=complex
-            ),
-        )
+        # todo fill in setup freq settings
+        self.CurrentFrame = self.ppcData.new_frame()
 
     # ---------------------------------------------------------------------------------------------------------------- #
     def clear_out_data(self):
         """
-        Deletes saved data frames
+        Deletes saved data frames. A new FrameStore is started, so previously returned data stays valid.
         """
-        self.ppcData = []
+        self.ppcData = self.new_frame_store()
         self.reset_new_data_frame()
 
     # ---------------------------------------------------------------------------------------------------------------- #
     def init_parser(self):
         """
-        Initializes the parser generator
+        Initializes the parser generator and the chunk decoder
         """
-        self.Parser = byte_parser()
+        self.Parser = byte_parser(self.cStats)
         next(self.Parser)
+        self.cChunkDecoder = ChunkDecoder()
+        self.bMessageStarted = False
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def read_buffer(self, fRead=None):
+        """
+        Reads from the device with the protocol dependent read function and counts the read bytes and time.
+        Args:
+            fRead: Read function to be used instead of device_read, e.g. read_available
+        Returns:
+            Byte(s) read from USB
+        """
+        fStart = time.perf_counter()
+        buffer = self.device_read() if fRead is None else fRead()
+        self.count_read(fStart, len(buffer))
+        return buffer
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def count_read(self, fStart: float, iBytes: int):
+        """
+        Adds a finished read to the acquisition statistics.
+        Args:
+            fStart: time.perf_counter() at the start of the read
+            iBytes: Number of bytes read
+        """
+        self.cStats.dStageTime["read"] += time.perf_counter() - fStart
+        self.cStats.iReadCalls += 1
+        if iBytes > 0:
+            self.cStats.iBytes += iBytes
+        else:
+            self.cStats.iEmptyReads += 1
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def receive(
+        self, cReader=None, bSaveData=False, bDeleteDataFrame=False, sSavePath="C/"
+    ):
+        """
+        Reads from the device once and parses the received bytes. With the chunk engine, the transport reads directly
+        into the ring of the ChunkDecoder and the messages are decoded from there, so no buffer is allocated per
+        read. The byte engine parses the buffer returned by read_buffer.
+        Args:
+            cReader: LowLatencyReader used for reading, None: device_read
+            bSaveData: When a message is EIT data, if it should be saved
+            bDeleteDataFrame: When a message is EIT data, if it should be deleted from RAM after saving
+            sSavePath: When a message is EIT data, save path
+        Returns:
+            (Number of received bytes, number of completed messages)
+        """
+        if self.sEngine != "chunk":
+            buffer = self.read_buffer(None if cReader is None else cReader.read)
+            if not buffer:
+                return 0, 0
+            return len(buffer), self.parse_buffer(
+                buffer, bSaveData, bDeleteDataFrame, sSavePath
+            )
+        cRing = self.cChunkDecoder.cRing
+        fStart = time.perf_counter()
+        iRead = self.read_into(cRing) if cReader is None else cReader.read_into(cRing)
+        self.count_read(fStart, iRead)
+        if iRead == 0:
+            return 0, 0
+        return iRead, self.parse_buffer(None, bSaveData, bDeleteDataFrame, sSavePath)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def get_statistics(self):
+        """
+        Returns:
+            Dictionary of the acquisition counters, rates and per stage times since the last reset, see
+            AcquisitionStats.get_report
+        """
+        return self.cStats.get_report()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def reset_statistics(self):
+        """
+        Resets all acquisition counters and stage times.
+        """
+        self.cStats.reset()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def get_frame_period(self):
+        """
+        Returns:
+            Expected time in seconds between two frames from the framerate of the setup, None if unknown
+        """
+        if self.setup is None or not self.setup.framerate or self.setup.framerate <= 0:
+            return None
+        return 1 / self.setup.framerate
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def get_end_of_data_timeout(self):
+        """
+        Returns:
+            Time in seconds without received data after which the data stream is considered to be finished. Without
+            a known framerate, the 10 s of the former fixed polling are used.
+        """
+        fPeriod = self.get_frame_period()
+        if fPeriod is None:
+            return 10.0
+        return self.iEndOfDataFrames * fPeriod + self.fEndOfDataMargin
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def low_latency_reader(self):
+        """
+        Creates the event driven reader used by the timed read loops. A single read waits at most a quarter frame
+        period (at most 50 ms), so the end of data and the end of the measurement time are noticed in time.
+        Returns:
+            LowLatencyReader
+        """
+        fPeriod = self.get_frame_period()
+        fMaxWait = 0.05 if fPeriod is None else min(fPeriod / 4, 0.05)
+        return LowLatencyReader(self, fMaxWait)
 
     # ---------------------------------------------------------------------------------------------------------------- #
     def read_fs(self):
         """
-        Read out USB connected via FS protocol
+        Read out USB connected via FS protocol, byte wise or in bulk read mode with read_fs_bulk.
         Returns:
-            Byte read from USB
+            Byte(s) read from USB
+        """
+        if not self.bBulkRead:
+            return self.cDevice.read()
+        return self.read_fs_bulk()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def read_fs_bulk(self):
+        """
+        Reads all bytes waiting in the input buffer of the FS device at once (at most iBlockSize). If nothing is
+        waiting, the first byte is awaited with the serial timeout, so an empty return still marks a timeout.
+        Returns:
+            Byte(s) read from USB
+        """
+        if not hasattr(self.cDevice, "in_waiting"):
+            return self.cDevice.read(self.iBlockSize)
+
+        iWaiting = self.cDevice.in_waiting
+        if iWaiting > 0:
+            return self.cDevice.read(min(iWaiting, self.iBlockSize))
+        buffer = self.cDevice.read(1)
+        if buffer:
+            iWaiting = self.cDevice.in_waiting
+            if iWaiting > 0:
+                buffer += self.cDevice.read(min(iWaiting, self.iBlockSize - 1))
+        return buffer
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def read_bulk(self):
+        """
+        Reads all received bytes at once independent of bBulkRead, awaiting the first byte with the read timeout of
+        the device. Used by the reader thread of AcquisitionThread, which queues every read as one buffer.
+        Returns:
+            Byte(s) read from USB, empty on timeout
+        """
+        if self.sDevicetype == "HS":
+            return self.device_read()
+        return self.read_fs_bulk()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def read_available(self):
+        """
+        Reads only the bytes already received, without waiting for the read timeout. Used by polling readers, e.g.
+        the asyncio interface (see eit_async.py). HS reads use the adaptive read size like read_hs.
+        Returns:
+            Byte(s) read from USB, empty if nothing was received
+        """
+        if self.sDevicetype == "HS":
+            buffer = self.cDevice.read_data_bytes(size=self.iHSReadSize, attempt=1)
+            self.adapt_hs_read_size(len(buffer))
+            return buffer
+        iWaiting = self.cDevice.in_waiting
+        if iWaiting > 0:
+            return self.cDevice.read(min(iWaiting, self.iBlockSize))
+        return b""
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def read_into(self, cRing: ByteRing, bWait: bool = True):
+        """
+        Reads from the device into the free space of cRing, the counterpart of device_read (bWait) and
+        read_available (not bWait). Serial (FS) devices read with readinto, so no buffer is allocated per read. The
+        buffers returned by pyftdi (HS) are copied into the ring.
+        Args:
+            cRing: ByteRing the bytes are added to
+            bWait: if the first byte is awaited with the read timeout of the device
+        Returns:
+            Number of bytes read
         """
-        return self.cDevice.read()
+        if self.sDevicetype == "HS" or not hasattr(self.cDevice, "readinto"):
+            buffer = self.device_read() if bWait else self.read_available()
+            cRing.write(buffer)
+            return len(buffer)
+        if bWait and not self.bBulkRead:
+            return self.readinto_device(cRing, 1)
+        iRead = self.readinto_device(
+            cRing, min(self.cDevice.in_waiting, self.iBlockSize)
+        )
+        if iRead == 0 and bWait:
+            # Await the first byte, then read all waiting bytes
+            iRead = self.readinto_device(cRing, 1)
+            if iRead > 0:
+                iRead += self.readinto_device(
+                    cRing, min(self.cDevice.in_waiting, self.iBlockSize - 1)
+                )
+        return iRead
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def readinto_device(self, cRing: ByteRing, iSize: int):
+        """
+        Reads at most iSize bytes with readinto of the serial device directly into cRing.
+        Returns:
+            Number of bytes read
+        """
+        if iSize <= 0:
+            return 0
+        iRead = self.cDevice.readinto(cRing.reserve(iSize)) or 0
+        cRing.commit(iRead)
+        return iRead
 
     # ---------------------------------------------------------------------------------------------------------------- #
     def send_fs(self, tosend):
@@ -191,11 +771,30 @@ class MessageParser:
     # ---------------------------------------------------------------------------------------------------------------- #
     def read_hs(self):
         """
-        Read out USB connected via HS protocol
+        Read out USB connected via HS protocol. The number of requested bytes is adapted to the received amount, see
+        adapt_hs_read_size.
         Returns:
             Byte read from USB
         """
-        return self.cDevice.read_data_bytes(size=1024, attempt=150)
+        buffer = self.cDevice.read_data_bytes(
+            size=self.iHSReadSize, attempt=self.iHSReadAttempts
+        )
+        self.adapt_hs_read_size(len(buffer))
+        return buffer
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def adapt_hs_read_size(self, iReceived: int):
+        """
+        Adapts the HS read size to the observed throughput: a completely filled read doubles the size up to
+        iHSMaxReadSize, so fast streams are drained in large transfers. A read filled less than a quarter halves it
+        down to iHSMinReadSize, so single command responses are not waiting for a large transfer.
+        Args:
+            iReceived: Number of bytes received by the last read
+        """
+        if iReceived >= self.iHSReadSize:
+            self.iHSReadSize = min(2 * self.iHSReadSize, self.iHSMaxReadSize)
+        elif iReceived < self.iHSReadSize // 4:
+            self.iHSReadSize = max(self.iHSReadSize // 2, self.iHSMinReadSize)
 
     # ---------------------------------------------------------------------------------------------------------------- #
     def send_hs(self, tosend):
@@ -206,6 +805,71 @@ class MessageParser:
         """
         self.cDevice.write_data(tosend)
 
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def command_transaction(self, command, fTimeout: float = 1.0):
+        """
+        Sends a command and reads until its acknowledge arrives or the deadline has passed. In contrast to
+        read_usb_till_timeout, it returns right after the acknowledge without waiting for a read timeout.
+        Args:
+            command: list/array of integers, [Command Tag, Length, Data..., Command Tag]
+            fTimeout: Deadline in seconds for the acknowledge
+        Returns:
+            Acknowledge code (ACK_OK: 0x83, NACK: 0x81, 0x82, communication timeout: 0x02), None if no acknowledge
+            arrived within fTimeout
+        """
+        self.piCommandReplies.clear()
+        self.device_send(command)
+        piReplies = self.wait_for_command_replies(1, fTimeout)
+        if len(piReplies) == 0:
+            return None
+        return piReplies[0]
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def command_batch(self, ppCommands, fTimeout: float = 1.0):
+        """
+        Sends several commands in one transfer and collects their acknowledges, which arrive in the order of the
+        commands.
+        Args:
+            ppCommands: List of commands, each a list/array of integers
+            fTimeout: Deadline in seconds for all acknowledges
+        Returns:
+            List of the acknowledge codes in command order, None for commands without acknowledge within fTimeout
+        """
+        self.piCommandReplies.clear()
+        self.device_send(bytearray().join(bytes(command) for command in ppCommands))
+        piReplies = self.wait_for_command_replies(len(ppCommands), fTimeout)
+        return piReplies + [None] * (len(ppCommands) - len(piReplies))
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def wait_for_command_replies(
+        self,
+        iCount: int,
+        fTimeout: float = 1.0,
+        bSaveData: bool = False,
+        bDeleteDataFrame: bool = False,
+        sSavePath: str = "C/",
+    ):
+        """
+        Reads and parses the USB connection until iCount command acknowledges have arrived or the deadline has passed.
+        Received replies are removed from piCommandReplies.
+        Args:
+            iCount: Number of expected acknowledges
+            fTimeout: Deadline in seconds for all acknowledges
+            bSaveData: if measured data received in between should be saved
+            bDeleteDataFrame: if data frame is deleted after saving data
+            sSavePath: Path where the data should be saved
+        Returns:
+            List of the acknowledge codes in order of arrival, shorter than iCount on timeout
+        """
+        fDeadline = time.perf_counter() + fTimeout
+        while len(self.piCommandReplies) < iCount:
+            if time.perf_counter() > fDeadline:
+                break
+            self.receive(None, bSaveData, bDeleteDataFrame, sSavePath)
+        piReplies = self.piCommandReplies[:iCount]
+        del self.piCommandReplies[:iCount]
+        return piReplies
+
     # ---------------------------------------------------------------------------------------------------------------- #
     def read_usb_for_seconds(
         self,
@@ -216,12 +880,13 @@ class MessageParser:
         bStartReset: bool = True,
     ):
         """
-        Reads out the USB connection for fTime seconds, regardless of whether data is received. Data bytes are parsed,
-        sorted into full messages and then handled according to their Command Tag. Status or requested information is
-        displayed if wished and measured EIT data is stored, deleted or returned.
+        Reads out the USB connection for fTime seconds, or until no data was received for several frame periods (see
+        get_end_of_data_timeout). Data bytes are parsed, sorted into full messages and then handled according to their
+        Command Tag. Status or requested information is displayed if wished and measured EIT data is stored, deleted or
+        returned.
         Args:
             fTime(float): time to read out usb connection (in seconds)
-            bSaveData: if data should be saved
+            bSaveData: if data should be saved, True/"npz": one file per frame, "recording": single recording file
             bDeleteDataFrame: if data frame is deleted after saving data
             sSavePath: Path where the data should be saved
         Returns:
@@ -230,31 +895,20 @@ class MessageParser:
         if bStartReset:
             self.reset_new_data_frame()
         iMessageCount = 0
-        bMessageStarted = False
-        timeout_count = 0
-        fEndtime = time.time() + fTime
-        while time.time() < fEndtime or bMessageStarted:
-            buffer = self.device_read()
-            if buffer:
-                message = self.Parser.send(buffer)
-
-                if len(message) > 0:
-                    bMessageStarted = False
-                    self.interpret_message(
-                        message, bSaveData, bDeleteDataFrame, sSavePath
-                    )
-                    iMessageCount += 1
-                else:
-                    bMessageStarted = True
-                timeout_count = 0
-                continue
-            else:
-                time.sleep(0.1)
-                timeout_count += 1
-
-            if timeout_count >= 100:
-                # Break if we haven't received any data
-                break
+        fEndOfData = self.get_end_of_data_timeout()
+        fEndtime = time.perf_counter() + fTime
+        fLastData = time.perf_counter()
+        with self.low_latency_reader() as cReader:
+            while time.perf_counter() < fEndtime or self.bMessageStarted:
+                iBytes, iMessages = self.receive(
+                    cReader, bSaveData, bDeleteDataFrame, sSavePath
+                )
+                if iBytes > 0:
+                    iMessageCount += iMessages
+                    fLastData = time.perf_counter()
+                elif time.perf_counter() - fLastData > fEndOfData:
+                    # Break if we haven't received any data for several frame periods
+                    break
         print(f"{iMessageCount} message(s) received.")
         return self.ppcData
 
@@ -271,7 +925,7 @@ class MessageParser:
         sorted into full messages and then handled according to their Command Tag. Status or requested information is
         displayed if wished and measured EIT data is stored, deleted or returned.
         Args:
-            bSaveData: if data should be saved
+            bSaveData: if data should be saved, True/"npz": one file per frame, "recording": single recording file
             bDeleteDataFrame: if data frame is deleted after saving data
             sSavePath: Path where the data should be saved
         Returns:
@@ -282,14 +936,11 @@ class MessageParser:
         iMessageCount = 0
         timeout_count = 0
         while True:
-            buffer = self.device_read()
-            if buffer:
-                message = self.Parser.send(buffer)
-                if len(message) > 0:
-                    self.interpret_message(
-                        message, bSaveData, bDeleteDataFrame, sSavePath
-                    )
-                    iMessageCount += 1
+            iBytes, iMessages = self.receive(
+                None, bSaveData, bDeleteDataFrame, sSavePath
+            )
+            if iBytes > 0:
+                iMessageCount += iMessages
                 timeout_count = 0
                 continue
             timeout_count += 1
@@ -300,6 +951,144 @@ class MessageParser:
         print(f"{iMessageCount} message(s) received.")
         return self.ppcData
 
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def iter_frames(
+        self,
+        fTime: float = None,
+        iMaxFrames: int = None,
+        bSaveData: bool = False,
+        sSavePath: str = "C/",
+        bStartReset: bool = True,
+    ):
+        """
+        Generator reading out the USB connection, which yields each EIT frame as soon as it is complete. Frames are
+        not kept in ppcData, so the memory use does not grow with the measurement time.
+        Args:
+            fTime: Time in seconds after which reading stops, None: no time limit
+            iMaxFrames: Number of frames after which reading stops, None: no limit
+            bSaveData: if data should be saved, True/"npz": one file per frame, "recording": single recording file
+            sSavePath: Path where the data should be saved
+            bStartReset: if the current data frame is reset before reading
+        Yields:
+            EITFrame, a copy which stays valid after the next frame
+        """
+        if bStartReset:
+            self.reset_new_data_frame()
+        pFrames = deque()
+        self.cFrameCallback = lambda frame: pFrames.append(copy_eit_frame(frame))
+        fEnd = None if fTime is None else time.perf_counter() + fTime
+        iFrames = 0
+        try:
+            while fEnd is None or time.perf_counter() < fEnd:
+                self.receive(None, bSaveData, True, sSavePath)
+                while pFrames:
+                    yield pFrames.popleft()
+                    iFrames += 1
+                    if iMaxFrames is not None and iFrames >= iMaxFrames:
+                        return
+        finally:
+            self.cFrameCallback = None
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def read_usb_threaded(
+        self,
+        fTime: float = None,
+        bSaveData: bool = False,
+        bDeleteDataFrame: bool = False,
+        sSavePath: str = "C/",
+        bStartReset: bool = True,
+        iQueueSize: int = 1024,
+        bDropOnOverflow: bool = False,
+    ):
+        """
+        Reads out the USB connection like read_usb_for_seconds (fTime given) or read_usb_till_timeout (fTime=None),
+        but a dedicated reader thread drains the device into a bounded queue, while a consumer thread parses,
+        interprets and saves the received data. Slow interpretation or saving only delays reading out the device when
+        the queue is full.
+        Args:
+            fTime(float): time to read out usb connection (in seconds), None to read until the connection times out
+            bSaveData: if data should be saved, True/"npz": one file per frame, "recording": single recording file
+            bDeleteDataFrame: if data frame is deleted after saving data
+            sSavePath: Path where the data should be saved
+            bStartReset: if the current data frame is reset before reading
+            iQueueSize: maximal number of read buffers waiting for the consumer
+            bDropOnOverflow: if read buffers are dropped while the queue is full, instead of waiting for the consumer
+        Returns:
+            List of received data eit frames, no Status messages are saved
+        """
+        if bStartReset:
+            self.reset_new_data_frame()
+        self.cAcquisition = AcquisitionThread(self, iQueueSize, bDropOnOverflow)
+        self.cAcquisition.run(fTime, bSaveData, bDeleteDataFrame, sSavePath)
+        dStatus = self.cAcquisition.get_status()
+        print(f"{dStatus['messages']} message(s) received.")
+        if dStatus["overflows"] > 0:
+            print(
+                f"Queue overflow: {dStatus['overflows']} buffer(s) with {dStatus['dropped_bytes']} byte(s) dropped."
+            )
+        return self.ppcData
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def parse_buffer(
+        self, buffer, bSaveData=False, bDeleteDataFrame=False, sSavePath="C/"
+    ):
+        """
+        Parses received bytes with the selected engine and interprets all completed messages.
+        Args:
+            buffer: bytes read from USB, None: the bytes already read into the ring of the ChunkDecoder (chunk engine)
+            bSaveData: When a message is EIT data, if it should be saved
+            bDeleteDataFrame: When a message is EIT data, if it should be deleted from RAM after saving
+            sSavePath: When a message is EIT data, save path
+        Returns:
+            Number of completed messages
+        """
+        iMessageCount = 0
+        fInterpretTime = 0.0
+        fSaveTime = self.cStats.dStageTime["save"]
+        fStart = time.perf_counter()
+        if self.sEngine == "chunk":
+            iMismatches = self.cChunkDecoder.iMismatchCount
+            if buffer is None:
+                cBlock, ppiOther = self.cChunkDecoder.decode_received()
+            else:
+                cBlock, ppiOther = self.cChunkDecoder.decode(buffer)
+            fInterpretStart = time.perf_counter()
+            for message in ppiOther:
+                self.interpret_message(message, bSaveData, bDeleteDataFrame, sSavePath)
+            if len(cBlock) > 0:
+                self.interpret_data_block(
+                    cBlock, bSaveData, bDeleteDataFrame, sSavePath
+                )
+            fInterpretTime = time.perf_counter() - fInterpretStart
+            self.cStats.iMismatchedMessages += (
+                self.cChunkDecoder.iMismatchCount - iMismatches
+            )
+            self.bMessageStarted = self.cChunkDecoder.bMessageStarted
+            iMessageCount = len(cBlock) + len(ppiOther)
+        else:
+            for i in range(len(buffer)):
+                message = self.Parser.send(buffer[i : i + 1])
+                if len(message) > 0:
+                    self.bMessageStarted = False
+                    fInterpretStart = time.perf_counter()
+                    self.interpret_message(
+                        message, bSaveData, bDeleteDataFrame, sSavePath
+                    )
+                    fInterpretTime += time.perf_counter() - fInterpretStart
+                    iMessageCount += 1
+                else:
+                    self.bMessageStarted = True
+
+        # Saving is counted separately
+        fSaveTime = self.cStats.dStageTime["save"] - fSaveTime
+        fInterpretTime -= fSaveTime
+        self.cStats.dStageTime["interpret"] += fInterpretTime
+        self.cStats.dStageTime["parse"] += (
+            time.perf_counter() - fStart - fInterpretTime - fSaveTime
+        )
+        self.cStats.iMessages += iMessageCount
+        return iMessageCount
+
     # ---------------------------------------------------------------------------------------------------------------- #
     def interpret_message(
         self, message, bSaveData=False, bDeleteDataFrame=False, sSavePath="C/"
@@ -316,6 +1105,14 @@ class MessageParser:
         if message[0] == 180:  # DATA 0XB4
             self.interpret_data_input(message, bSaveData, bDeleteDataFrame, sSavePath)
         else:
+            if (
+                message[0] == ACK_TAG
+                and len(message) == 4
+                and message[2] in COMMAND_REPLY_CODES
+            ):
+                self.piCommandReplies.append(message[2])
+            if message[0] == ACK_TAG and len(message) == 4 and message[2] == ACK_HOLDUP:
+                self.cStats.iHoldups += 1
             mess_hex = [hex(receive) for receive in message]
             if self.bPrintMessages:
                 if message[0] == 24:  # 0x24 Acknowledgement Message
@@ -342,6 +1139,9 @@ class MessageParser:
         """
         # EXCITATIONSETTING
         freq_group = two_byte_to_int(message[5:7])
+        self.cStats.iDataMessages += 1
+        if message[2] > self.iMaxChannelGroups:
+            self.cStats.iSkippedChannelGroupMessages += 1
         if (
             message[2] <= self.iMaxChannelGroups
         ):  # Necessary, since  all four channel groups are send
@@ -376,14 +1176,508 @@ class MessageParser:
             if self.iSaveCounter == self.iLenDataperFrame:
                 # Frame Full
                 self.CurrentFrame.timestamp2 = byteintarray_to_float(message[7:11])
-                if bSave:
-                    save_data_frame(sSavePath, self.CurrentFrame, self.iNPZSaveIndex)
-                    self.iNPZSaveIndex += 1
-                if bDeleteFrame:
-                    del self.CurrentFrame
-                else:
-                    self.ppcData.append(self.CurrentFrame)
-                self.reset_new_data_frame()
+                self.finish_data_frame(bSave, bDeleteFrame, sSavePath)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def interpret_data_block(
+        self, cBlock: DataBlock, bSave=False, bDeleteFrame=False, sSavePath="C/"
+    ):
+        """
+        Interpreter of a block of decoded data messages from the ChunkDecoder. Equivalent to interpret_data_input for
+        each message, but the channel data is copied message group wise into the current frame.
+        Args:
+            cBlock: DataBlock of received data messages
+            bSave: If data should be saved
+            bDeleteFrame: If data should be deleted from RAM after saving
+            sSavePath: Save path
+        """
+        # Necessary, since all four channel groups are send
+        pbUsed = cBlock.channel_group <= self.iMaxChannelGroups
+        self.cStats.iDataMessages += len(cBlock)
+        self.cStats.iSkippedChannelGroupMessages += len(cBlock) - int(
+            np.count_nonzero(pbUsed)
+        )
+        piGroups = cBlock.channel_group[pbUsed]
+        piExcitation = cBlock.excitation_stgs[pbUsed]
+        piFreqRows = cBlock.frequency_row[pbUsed]
+        piTimestamps = cBlock.timestamp[pbUsed]
+        pcData = cBlock.data[pbUsed]
+
+        iNum = len(piGroups)
+        iIdx = 0
+        while iIdx < iNum:
+            iTake = min(iNum - iIdx, (self.iLenDataperFrame - self.iSaveCounter) // 16)
+            iStop = iIdx + iTake
+
+            # EXCITATIONSETTING
+            pbExc = (piGroups[iIdx:iStop] == 1) & (piFreqRows[iIdx:iStop] == 1)
+            iNumExc = int(np.count_nonzero(pbExc))
+            self.CurrentFrame.excitation_stgs[
+                self.iInjIndex : self.iInjIndex + iNumExc
+            ] = piExcitation[iIdx:iStop][pbExc]
+            self.iInjIndex += iNumExc
+
+            # TIMESTAMP
+            if self.iSaveCounter == 0:
+                self.CurrentFrame.timestamp1 = piTimestamps[iIdx].tolist()
+                self.CurrentFrame.timestamp_pc = datetime.now().timestamp()
+
+            # Data Handling
+            self.CurrentFrame.ppcData[
+                self.iSaveCounter : self.iSaveCounter + 16 * iTake
+            ] = pcData[iIdx:iStop].ravel()
+            self.iSaveCounter += 16 * iTake
+            iIdx = iStop
+            if self.iSaveCounter == self.iLenDataperFrame:
+                # Frame Full
+                self.CurrentFrame.timestamp2 = byteintarray_to_float(
+                    piTimestamps[iStop - 1]
+                )
+                self.finish_data_frame(bSave, bDeleteFrame, sSavePath)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def finish_data_frame(self, bSave=False, bDeleteFrame=False, sSavePath="C/"):
+        """
+        Handles a completely received EIT frame: saves it, stores it in RAM or deletes it and starts a new frame.
+        Args:
+            bSave: If data should be saved, True or "npz": one npz file per frame, "recording": appended to a single
+                   recording file (see recording.py)
+            bDeleteFrame: If data should be deleted from RAM after saving
+            sSavePath: Save path
+        """
+        if bSave:
+            if self.cAsyncWriter is not None:
+                self.cAsyncWriter.put(
+                    copy_eit_frame(self.CurrentFrame),
+                    bSave,
+                    sSavePath,
+                    self.iNPZSaveIndex,
+                )
+            else:
+                self.save_frame(self.CurrentFrame, bSave, sSavePath, self.iNPZSaveIndex)
+            if bSave != "recording":
+                self.iNPZSaveIndex += 1
+        self.cStats.iFrames += 1
+        if self.cFrameCallback is not None:
+            self.cFrameCallback(self.CurrentFrame)
+        if bDeleteFrame:
+            del self.CurrentFrame
+        else:
+            self.ppcData.append(self.CurrentFrame)
+        self.reset_new_data_frame()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def save_frame(self, frame: EITFrame, bSave=True, sSavePath="C/", iNPZSaveIndex=1):
+        """
+        Saves a single EIT frame and counts it in the acquisition statistics.
+        Args:
+            frame: EITFrame to be saved
+            bSave: True or "npz": one npz file per frame, "recording": appended to a single recording file
+            sSavePath: Save path
+            iNPZSaveIndex: Index of the npz file
+        """
+        fStart = time.perf_counter()
+        self.write_frame(frame, bSave, sSavePath, iNPZSaveIndex)
+        self.cStats.dStageTime["save"] += time.perf_counter() - fStart
+        self.cStats.iFramesSaved += 1
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def write_frame(self, frame: EITFrame, bSave=True, sSavePath="C/", iNPZSaveIndex=1):
+        """
+        Saves a single EIT frame without touching the acquisition statistics, used by the worker thread of the
+        AsyncFrameWriter, which counts its frames itself.
+        Args:
+            frame: EITFrame to be saved
+            bSave: True or "npz": one npz file per frame, "recording": appended to a single recording file
+            sSavePath: Save path
+            iNPZSaveIndex: Index of the npz file
+        """
+        if bSave == "recording":
+            self.get_recording_writer(sSavePath).write_frame(frame)
+        else:
+            save_data_frame(sSavePath, frame, iNPZSaveIndex)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def start_async_writer(self, iQueueSize=256, iBatchSize=32):
+        """
+        Saves all following frames in a worker thread of an AsyncFrameWriter, instead of inside the USB read loop.
+        Args:
+            iQueueSize: Maximal number of frames waiting to be saved, reading blocks while the queue is full
+            iBatchSize: Maximal number of frames the worker saves at once
+        """
+        if self.cAsyncWriter is None:
+            self.cAsyncWriter = AsyncFrameWriter(self, iQueueSize, iBatchSize)
+            self.cAsyncWriter.start()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def stop_async_writer(self):
+        """
+        Waits until all queued frames are saved and stops the worker thread. The frames and save time of the worker
+        are added to the acquisition statistics. Following frames are saved directly.
+        """
+        if self.cAsyncWriter is not None:
+            try:
+                self.cAsyncWriter.close()
+            finally:
+                dStatus = self.cAsyncWriter.get_status()
+                self.cStats.iFramesSaved += dStatus["written"]
+                self.cStats.dStageTime["save"] += dStatus["save_time_s"]
+                print(f"{dStatus['written']} frame(s) saved asynchronously.")
+                self.cAsyncWriter = None
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def get_recording_writer(self, sSavePath="C/"):
+        """
+        Returns the RecordingWriter for sSavePath. A new recording file is started at the first frame or if the save
+        path changed.
+        Args:
+            sSavePath: Save path
+        Returns:
+            RecordingWriter
+        """
+        if self.cRecordingWriter is not None and self.sRecordingPath != sSavePath:
+            self.close_recording()
+        if self.cRecordingWriter is None:
+            self.sRecordingPath = sSavePath
+            self.cRecordingWriter = RecordingWriter(
+                new_recording_path(sSavePath),
+                n_el=self.setup.n_el,
+                iNumExcitationSettings=self.iNumExcitationSettings,
+                iNumChannels=self.iMaxChannelGroups * 16,
+                iNumFreqSettings=self.iNumFreqSettings,
+                dtype=self.dtype,
+                setup=self.setup,
+            )
+        return self.cRecordingWriter
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def close_recording(self):
+        """
+        Finishes the current recording file, if one is open.
+        """
+        if self.cRecordingWriter is not None:
+            self.cRecordingWriter.close()
+            self.cRecordingWriter = None
+            self.sRecordingPath = None
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# -------------------------------------------------------------------------------------------------------------------- #
+class AsyncFrameWriter:
+    """
+    Saves EIT frames in a worker thread. Frames are put into a bounded queue, the worker takes up to iBatchSize
+    frames at once and saves them with MessageParser.write_frame, before the recording file is flushed.
+    The worker only updates its own counters, the acquisition statistics of the parser are updated by the reading
+    thread. They are merged in MessageParser.stop_async_writer.
+    """
+
+    def __init__(
+        self, cParser: MessageParser, iQueueSize: int = 256, iBatchSize: int = 32
+    ):
+        self.cParser = cParser
+        self.iBatchSize = iBatchSize
+        self.qFrames = queue.Queue(maxsize=iQueueSize)
+        self.cThread = None
+        self.cError = None
+
+        # Reporting
+        self.iFramesQueued = 0
+        self.iFramesWritten = 0
+        self.iBatchesWritten = 0
+        self.iMaxPending = 0
+        self.fSaveTime = 0.0
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def get_status(self):
+        """
+        Returns:
+            Dictionary of the number of queued, pending and written frames, the maximal number of pending frames,
+            the number of written batches and the time spent saving
+        """
+        return {
+            "queued": self.iFramesQueued,
+            "pending": self.iFramesQueued - self.iFramesWritten,
+            "written": self.iFramesWritten,
+            "max_pending": self.iMaxPending,
+            "batches": self.iBatchesWritten,
+            "save_time_s": self.fSaveTime,
+        }
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def start(self):
+        """
+        Starts the worker thread.
+        """
+        self.cThread = threading.Thread(target=self.worker, daemon=True)
+        self.cThread.start()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def put(self, frame: EITFrame, bSave=True, sSavePath="C/", iNPZSaveIndex=1):
+        """
+        Queues a frame for saving, blocks while the queue is full. Errors of the worker thread are raised again.
+        Args:
+            frame: EITFrame to be saved, must not be changed afterwards
+            bSave: True or "npz": one npz file per frame, "recording": appended to a single recording file
+            sSavePath: Save path
+            iNPZSaveIndex: Index of the npz file
+        """
+        if self.cError is not None:
+            raise self.cError
+        self.qFrames.put((frame, bSave, sSavePath, iNPZSaveIndex))
+        self.iFramesQueued += 1
+        self.iMaxPending = max(
+            self.iMaxPending, self.iFramesQueued - self.iFramesWritten
+        )
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def worker(self):
+        """
+        Worker thread: saves the queued frames batch wise until None is queued.
+        """
+        bRunning = True
+        while bRunning:
+            pBatch = [self.qFrames.get()]
+            while len(pBatch) < self.iBatchSize:
+                try:
+                    pBatch.append(self.qFrames.get_nowait())
+                except queue.Empty:
+                    break
+            bRunning = all(item is not None for item in pBatch)
+            fStart = time.perf_counter()
+            try:
+                for item in pBatch:
+                    if item is not None and self.cError is None:
+                        self.cParser.write_frame(*item)
+                        self.iFramesWritten += 1
+                if self.cParser.cRecordingWriter is not None:
+                    self.cParser.cRecordingWriter.flush()
+                self.iBatchesWritten += 1
+            except Exception as e:
+                self.cError = e
+            finally:
+                self.fSaveTime += time.perf_counter() - fStart
+                for _ in pBatch:
+                    self.qFrames.task_done()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def flush(self):
+        """
+        Waits until all queued frames are saved. Errors of the worker thread are raised again.
+        """
+        self.qFrames.join()
+        if self.cError is not None:
+            raise self.cError
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def close(self):
+        """
+        Saves all queued frames and stops the worker thread.
+        """
+        if self.cThread is not None:
+            self.qFrames.put(None)
+            self.cThread.join()
+            self.cThread = None
+        if self.cError is not None:
+            raise self.cError
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# -------------------------------------------------------------------------------------------------------------------- #
+class AcquisitionThread:
+    """
+    Decouples reading out the USB connection from interpreting the data. A reader thread drains the device of a
+    MessageParser into a bounded queue, a consumer thread parses, interprets and saves the queued buffers. Every read
+    takes all received bytes at once (see MessageParser.read_bulk), so one queue item holds many messages.
+    If the queue is full, the reader waits for the consumer (back-pressure), so no measurement data is lost. With
+    bDropOnOverflow, the read buffer is dropped instead and reported as overflow. The parser and the current data frame
+    are then reset at the next buffer after a gap, so no frame is assembled from discontinuous data.
+    """
+
+    def __init__(
+        self,
+        cParser: MessageParser,
+        iQueueSize: int = 1024,
+        bDropOnOverflow: bool = False,
+    ):
+        self.cParser = cParser
+        self.iQueueSize = iQueueSize
+        self.bDropOnOverflow = bDropOnOverflow
+        self.qBuffers = queue.Queue(maxsize=iQueueSize)
+        self.evStop = threading.Event()
+        self.cError = None
+
+        # Reporting
+        self.iBuffersRead = 0
+        self.iBytesRead = 0
+        self.iMaxQueueDepth = 0
+        self.iOverflowCount = 0
+        self.iDroppedBytes = 0
+        self.iBlockedPuts = 0
+        self.iMessageCount = 0
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def get_status(self):
+        """
+        Returns:
+            Dictionary of the current queue depth, the maximal queue depth so far, overflow counters, the number of
+            reads which waited for the consumer and the number of read buffers, bytes and interpreted messages
+        """
+        return {
+            "queue_depth": self.qBuffers.qsize(),
+            "max_queue_depth": self.iMaxQueueDepth,
+            "queue_size": self.iQueueSize,
+            "overflows": self.iOverflowCount,
+            "dropped_bytes": self.iDroppedBytes,
+            "blocked_puts": self.iBlockedPuts,
+            "buffers": self.iBuffersRead,
+            "bytes": self.iBytesRead,
+            "messages": self.iMessageCount,
+        }
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def reader(self, fTime):
+        """
+        Reader thread: reads out the device for fTime seconds (None: until the first empty read) and queues every
+        received buffer. After fTime, reading continues while a started message is not yet complete.
+        Args:
+            fTime: time to read out usb connection (in seconds) or None
+        """
+        bGap = False
+        fEndtime = None if fTime is None else time.perf_counter() + fTime
+        fEndOfData = self.cParser.get_end_of_data_timeout()
+        fLastData = time.perf_counter()
+        try:
+            # Without time limit, reading ends on the first device read timeout as in read_usb_till_timeout
+            cContext = (
+                nullcontext() if fTime is None else self.cParser.low_latency_reader()
+            )
+            with cContext as cReader:
+                while not self.evStop.is_set():
+                    if fEndtime is not None and time.perf_counter() >= fEndtime:
+                        # Wait for the consumer, then only complete a started message
+                        self.qBuffers.join()
+                        if not self.cParser.bMessageStarted:
+                            break
+                    buffer = self.cParser.read_buffer(
+                        self.cParser.read_bulk if cReader is None else cReader.read
+                    )
+                    if buffer:
+                        fLastData = time.perf_counter()
+                        self.iBuffersRead += 1
+                        self.iBytesRead += len(buffer)
+                        if self.bDropOnOverflow:
+                            try:
+                                self.qBuffers.put_nowait((bGap, buffer))
+                                bGap = False
+                            except queue.Full:
+                                self.iOverflowCount += 1
+                                self.iDroppedBytes += len(buffer)
+                                bGap = True
+                        else:
+                            self.put_blocking(buffer)
+                        self.iMaxQueueDepth = max(
+                            self.iMaxQueueDepth, self.qBuffers.qsize()
+                        )
+                        continue
+                    if fEndtime is None:
+                        # Break if we haven't received any data
+                        break
+                    if time.perf_counter() - fLastData > fEndOfData:
+                        # Break if we haven't received any data for several frame periods
+                        break
+        finally:
+            self.qBuffers.put(None)
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def put_blocking(self, buffer):
+        """
+        Queues a read buffer and waits for free space in the queue, if the consumer is behind. The consumer keeps
+        draining the queue after an error, so the wait always ends.
+        Args:
+            buffer: Byte(s) read from USB
+        """
+        try:
+            self.qBuffers.put_nowait((False, buffer))
+        except queue.Full:
+            self.iBlockedPuts += 1
+            self.qBuffers.put((False, buffer))
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def consumer(self, bSaveData, bDeleteDataFrame, sSavePath):
+        """
+        Consumer thread: parses, interprets and saves the queued buffers until the reader has finished.
+        Args:
+            bSaveData: if data should be saved
+            bDeleteDataFrame: if data frame is deleted after saving data
+            sSavePath: Path where the data should be saved
+        """
+        while True:
+            item = self.qBuffers.get()
+            try:
+                if item is None:
+                    return
+                if self.cError is not None:
+                    continue  # Only drain the queue
+                bGap, buffer = item
+                if bGap:
+                    self.cParser.init_parser()
+                    self.cParser.reset_new_data_frame()
+                self.iMessageCount += self.cParser.parse_buffer(
+                    buffer, bSaveData, bDeleteDataFrame, sSavePath
+                )
+            except Exception as e:
+                self.cError = e
+                self.evStop.set()
+            finally:
+                self.qBuffers.task_done()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def start(
+        self, fTime=None, bSaveData=False, bDeleteDataFrame=False, sSavePath="C/"
+    ):
+        """
+        Starts the reader and the consumer thread.
+        Args:
+            fTime: time to read out usb connection (in seconds), None to read until the connection times out
+            bSaveData: if data should be saved
+            bDeleteDataFrame: if data frame is deleted after saving data
+            sSavePath: Path where the data should be saved
+        """
+        self.cReaderThread = threading.Thread(
+            target=self.reader, args=(fTime,), daemon=True
+        )
+        self.cConsumerThread = threading.Thread(
+            target=self.consumer,
+            args=(bSaveData, bDeleteDataFrame, sSavePath),
+            daemon=True,
+        )
+        self.cConsumerThread.start()
+        self.cReaderThread.start()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def stop(self):
+        """
+        Requests the reader thread to stop, already queued buffers are still interpreted.
+        """
+        self.evStop.set()
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def join(self):
+        """
+        Waits for both threads to finish. Errors of the consumer thread are raised again.
+        """
+        self.cReaderThread.join()
+        self.cConsumerThread.join()
+        if self.cError is not None:
+            raise self.cError
+
+    # ---------------------------------------------------------------------------------------------------------------- #
+    def run(self, fTime=None, bSaveData=False, bDeleteDataFrame=False, sSavePath="C/"):
+        """
+        Starts both threads and waits until they are finished.
+        """
+        self.start(fTime, bSaveData, bDeleteDataFrame, sSavePath)
+        self.join()
 
 
 # -------------------------------------------------------------------------------------------------------------------- #
@@ -396,6 +1690,30 @@ def make_eitframes_hex(FrameList):
     return result
 
 
+# -------------------------------------------------------------------------------------------------------------------- #
+def copy_eit_frame(frame: EITFrame) -> EITFrame:
+    """
+    Copies an EIT frame, so it stays valid when the original arrays are reused.
+    Args:
+        frame: EITFrame to be copied
+    Returns:
+        EITFrame with copied arrays
+    """
+    return EITFrame(
+        n_el=frame.n_el,
+        excitation_stgs=np.array(frame.excitation_stgs),
+        frequency_stgs=np.array(frame.frequency_stgs),
+        timestamp1=(
+            list(frame.timestamp1)
+            if np.ndim(frame.timestamp1) > 0
+            else frame.timestamp1
+        ),
+        timestamp2=frame.timestamp2,
+        timestamp_pc=frame.timestamp_pc,
+        ppcData=np.array(frame.ppcData),
+    )
+
+
 # -------------------------------------------------------------------------------------------------------------------- #
 def make_results_folder(bCreateResultsFolder: bool, bSaveData: bool, sSavePath: str):
     """
@@ -419,11 +1737,13 @@ def get_data_as_matrix(FrameList):
     """
     List of EITFrames to be reshaped into matrix of [Number frames, num injection settings, n_el]
     Args:
-        FrameList: List of EITFrames to be reshaped into matrix
+        FrameList: List of EITFrames or FrameStore to be reshaped into matrix
 
     Returns:
-            np.array of eit data of shape [Number frames, num injection settings, n_el]
+            np.array of eit data of shape [Number frames, num injection settings, n_el], a view for a FrameStore
     """
+    if isinstance(FrameList, FrameStore):
+        return FrameList.get_data_as_matrix()
     result = []
     for f in FrameList:
         L = len(f.ppcData) // len(f.excitation_stgs)
@@ -432,13 +1752,14 @@ def get_data_as_matrix(FrameList):
 
 
 # -------------------------------------------------------------------------------------------------------------------- #
-def save_data_frame(path: str, dataframe: EITFrame, iNPZSaveIndex: int):
+def save_data_frame(path: str, dataframe: EITFrame, iNPZSaveIndex: int, dtype=None):
     """
     Saves a single EIT frame in a npz-file. Based on the EITframe class. Saves it at self.NPZSaveIndex
     Args:
         path: Where to save the EIT frame
         dataframe: EITFrame to be saved
         iNPZSaveIndex: Index of the EIT frame to be saved
+        dtype: Complex data type ppcData is saved in, None keeps the data type of the frame
     """
     np.savez(
         path + "eitsample_{0:06d}.npz".format(iNPZSaveIndex),
@@ -448,20 +1769,24 @@ def save_data_frame(path: str, dataframe: EITFrame, iNPZSaveIndex: int):
         timestamp1=dataframe.timestamp1,
         timestamp2=dataframe.timestamp2,
         timestamp_pc=dataframe.timestamp_pc,
-        ppcData=dataframe.ppcData,
+        ppcData=np.asarray(dataframe.ppcData, dtype=dtype),
     )
 
 
 # -------------------------------------------------------------------------------------------------------------------- #
 def load_eit_frames(path):
     """
-    Loads NPZ eit frames and stores them in a list of EITFrame
+    Loads NPZ eit frames and stores them in a list of EITFrame. If path is a recording file or a directory containing
+    one, the recording is memory-mapped instead and frames are only read when they are accessed.
     Args:
-        path: Path of the NPZ eit frames
+        path: Path of the NPZ eit frames, of a recording file or of a directory containing a recording file
 
     Returns:
-        List of EITFrame
+        List of EITFrame or RecordingReader
     """
+    sRecording = find_recording(path)
+    if sRecording is not None:
+        return open_recording(sRecording)
     loaded = []
     files = os.listdir(path)
     files = sorted(files)
@@ -481,16 +1806,24 @@ def load_eit_frames(path):
 
 
 # -------------------------------------------------------------------------------------------------------------------- #
-def load_eit_frames_into_nparray(path):
+def load_eit_frames_into_nparray(path, dtype=np.complex64):
     """
-    Load NPZ eit frames, retrieves the complex data and stores it in a numpy array.
+    Load NPZ eit frames, retrieves the complex data and stores it in a numpy array. For a recording file (or a
+    directory containing one), the memory-mapped data is returned without reading it (if dtype matches the recorded
+    data type).
     Args:
-        path: Path of the NPZ eit frames
+        path: Path of the NPZ eit frames, of a recording file or of a directory containing a recording file
+        dtype: Complex data type of the returned array. The device measures in single precision, so complex64 keeps
+               all information, also for frames saved as complex128.
 
     Returns: np.array(ppcData)
     """
+    sRecording = find_recording(path)
+    if sRecording is not None:
+        pcData = open_recording(sRecording).get_data_as_matrix()
+        return np.asarray(pcData.reshape(len(pcData), -1), dtype=dtype)
     loaded = load_eit_frames(path)
     l = []
     for frame in loaded:
         l.append(frame.ppcData)
-    return np.array(l)
+    return np.array(l, dtype=dtype)
@@ -0,0 +1,49 @@
+"""Shared fixtures of the hardware-free tests, the byte streams are generated with the SimulatedDevice"""
+
+import numpy as np
+import pytest
+
+from sciopy import EitMeasurementSetup
+from sciopy.simulation import SimulatedDevice
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def make_setup(n_el: int, iFrames: int) -> EitMeasurementSetup:
+    return EitMeasurementSetup(
+        burst_count=iFrames,
+        n_el=n_el,
+        exc_freq=10000,
+        framerate=50,
+        amplitude=0.01,
+        inj_skip=0,
+        gain=1,
+        adc_range=1,
+    )
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def make_stream(n_el: int, iFrames: int, seed: int = 0) -> bytes:
+    """
+    Byte stream of one measurement: acknowledgement of the start command followed by iFrames frames.
+    """
+    cDevice = SimulatedDevice(
+        n_el=n_el, burst_count=iFrames, realtime=False, timeout=0, seed=seed
+    )
+    cDevice.write(bytes([0xB4, 0x01, 0x01, 0xB4]))
+    return cDevice.read(1 << 31)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+@pytest.fixture
+def setup_factory():
+    return make_setup
+
+
+@pytest.fixture
+def stream_factory():
+    return make_stream
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(1234)
@@ -0,0 +1,108 @@
+"""Equivalence of the hexadecimal string and the uint8 legacy chains, holdup removal and the potential matrix"""
+
+import numpy as np
+import pytest
+
+from sciopy import EIT_16_32_64_128
+from sciopy.com_util import (
+    bursts_to_potential_matrix,
+    length_correction,
+    remove_holdup_messages,
+    reshape_full_message_in_bursts,
+    reshape_full_message_in_bursts_uint8,
+    split_bursts_in_frames,
+    split_bursts_in_frames_uint8,
+)
+from sciopy.datatype_conversion import del_hex_in_list
+
+HOLDUP = bytes([0x18, 0x01, 0x92, 0x18])
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def insert_holdups(bStream: bytes, rng, iCount: int = 5) -> bytes:
+    bResult = bytearray(bStream)
+    for iPos in sorted(rng.integers(4, len(bResult), iCount))[::-1]:
+        bResult[iPos:iPos] = HOLDUP
+    return bytes(bResult)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def legacy_frames(bStream: bytes, setup, channel_group):
+    data = del_hex_in_list([hex(b) for b in bStream])
+    data = reshape_full_message_in_bursts(data, setup)
+    return split_bursts_in_frames(data, setup.burst_count, channel_group)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def uint8_frames(bStream: bytes, setup, channel_group, compact=False):
+    data = reshape_full_message_in_bursts_uint8(bStream, setup)
+    return split_bursts_in_frames_uint8(
+        data, setup.burst_count, channel_group, compact=compact
+    )
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("n_el", [16, 32])
+def test_uint8_chain_matches_the_hex_string_chain(
+    setup_factory, stream_factory, rng, n_el
+):
+    setup = setup_factory(n_el, 3)
+    cEIT = EIT_16_32_64_128(n_el)
+    bStream = insert_holdups(stream_factory(n_el, 3), rng)
+
+    pLegacy = legacy_frames(bStream, setup, cEIT.channel_group)
+    pUint8 = uint8_frames(bStream, setup, cEIT.channel_group)
+
+    assert pLegacy.shape == pUint8.shape
+    for cLegacy, cUint8 in zip(pLegacy.ravel(), pUint8.ravel()):
+        for sField in cLegacy.__dataclass_fields__:
+            x, y = getattr(cLegacy, sField), getattr(cUint8, sField)
+            assert type(x) == type(y), sField
+            np.testing.assert_array_equal(x, y, err_msg=sField)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("n_el", [16, 32, 64])
+def test_potential_matrix_paths_match(setup_factory, stream_factory, n_el):
+    setup = setup_factory(n_el, 3)
+    bStream = stream_factory(n_el, 3)
+    cEIT = EIT_16_32_64_128(n_el)
+    cEIT.setup = setup
+
+    cEIT.data = legacy_frames(bStream, setup, cEIT.channel_group)
+    pcLegacy = cEIT.get_data_as_matrix()
+    cEIT.data = uint8_frames(bStream, setup, cEIT.channel_group, compact=True)
+    pcCompact = cEIT.get_data_as_matrix()
+    cEIT.data = reshape_full_message_in_bursts_uint8(bStream, setup)
+    pcBursts = cEIT.get_data_as_matrix()
+
+    assert pcLegacy.shape == (3, n_el, n_el)
+    np.testing.assert_array_equal(pcLegacy, pcCompact)
+    np.testing.assert_array_equal(pcLegacy, pcBursts)
+    np.testing.assert_array_equal(
+        pcLegacy,
+        bursts_to_potential_matrix(
+            reshape_full_message_in_bursts_uint8(bStream, setup),
+            3,
+            n_el,
+            cEIT.channel_group,
+        ),
+    )
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def test_remove_holdup_messages_only_removes_the_exact_sequence():
+    piData = np.array(
+        [0xB4, 0x18, 0x01, 0x92, 0x18, 0x18, 0x10, 0x92, 0x18, 0x18, 0x01, 0x92, 0x18],
+        dtype=np.uint8,
+    )
+    piResult, iHoldups = remove_holdup_messages(piData)
+    assert iHoldups == 2
+    assert list(piResult) == [0xB4, 0x18, 0x10, 0x92, 0x18]
+
+    psResult, iHoldups = remove_holdup_messages(
+        del_hex_in_list([hex(b) for b in piData])
+    )
+    assert iHoldups == 2
+    assert list(psResult) == ["b4", "18", "10", "92", "18"]
+    assert list(length_correction(piData)) == list(piResult)
@@ -0,0 +1,84 @@
+"""Equivalence of the byte and chunk parser engines and of the structured data message view"""
+
+import struct
+
+import numpy as np
+import pytest
+
+from sciopy.com_util import burst_to_messages
+from sciopy.usb_message_parser import MessageParser, get_data_as_matrix
+
+ACK = bytes([0x18, 0x01, 0x83, 0x18])
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def parse_stream(setup, bStream, sEngine, iChunkSize=None):
+    """
+    Parses bStream with a device-less MessageParser, at once or split into chunks of iChunkSize bytes.
+    """
+    cParser = MessageParser(None, devicetype="FS", engine=sEngine)
+    cParser.bPrintMessages = False
+    cParser.set_measurement_setup(setup)
+    cParser.init_parser()
+    iChunkSize = iChunkSize or len(bStream)
+    for i in range(0, len(bStream), iChunkSize):
+        cParser.parse_buffer(bStream[i : i + iChunkSize])
+    return cParser.ppcData
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("n_el", [16, 32, 64])
+@pytest.mark.parametrize("iChunkSize", [None, 1000, 7])
+def test_byte_and_chunk_engine_give_the_same_frames(
+    setup_factory, stream_factory, n_el, iChunkSize
+):
+    iFrames = 3
+    setup = setup_factory(n_el, iFrames)
+    bStream = stream_factory(n_el, iFrames) + ACK
+
+    pByte = parse_stream(setup, bStream, "byte")
+    pChunk = parse_stream(setup, bStream, "chunk", iChunkSize)
+
+    assert len(pByte) == len(pChunk) == iFrames
+    np.testing.assert_array_equal(get_data_as_matrix(pByte), get_data_as_matrix(pChunk))
+    for cByte, cChunk in zip(pByte, pChunk):
+        np.testing.assert_array_equal(cByte.excitation_stgs, cChunk.excitation_stgs)
+        np.testing.assert_array_equal(cByte.frequency_stgs, cChunk.frequency_stgs)
+        assert cByte.timestamp1 == cChunk.timestamp1
+        assert cByte.timestamp2 == cChunk.timestamp2
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def test_chunk_engine_skips_corrupted_messages(setup_factory, stream_factory):
+    setup = setup_factory(16, 2)
+    bStream = stream_factory(16, 2) + ACK
+    # Garbage between the start acknowledgement and the first data message
+    bCorrupted = bStream[:4] + bytes([0x01, 0x02, 0x03]) + bStream[4:]
+
+    pReference = parse_stream(setup, bStream, "byte")
+    pChunk = parse_stream(setup, bCorrupted, "chunk", 100)
+
+    np.testing.assert_array_equal(
+        get_data_as_matrix(pReference), get_data_as_matrix(pChunk)
+    )
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def test_data_message_view_matches_the_byte_layout(stream_factory):
+    bStream = stream_factory(32, 1)[len(ACK) :]
+    pcMessages = burst_to_messages(bStream)
+
+    assert len(pcMessages) == len(bStream) // 140
+    for i in [0, 1, len(pcMessages) - 1]:
+        bMessage = bStream[i * 140 : (i + 1) * 140]
+        cMessage = pcMessages[i]
+        assert cMessage["start_tag"] == bMessage[0] == 0xB4
+        assert cMessage["end_tag"] == bMessage[139] == 0xB4
+        assert cMessage["channel_group"] == bMessage[2]
+        assert list(cMessage["excitation_stgs"]) == list(bMessage[3:5])
+        assert cMessage["frequency_row"] == struct.unpack(">H", bMessage[5:7])[0]
+        assert cMessage["timestamp"] == struct.unpack(">I", bMessage[7:11])[0]
+        pfValues = struct.unpack(">32f", bMessage[11:139])
+        np.testing.assert_array_equal(
+            cMessage["data"].astype(np.float32).ravel(), np.float32(pfValues)
+        )
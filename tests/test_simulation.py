@@ -0,0 +1,80 @@
+"""Measurements with the SimulatedDevice and the cache of the applied device setup"""
+
+import numpy as np
+import pytest
+
+from sciopy import EIT_16_32_64_128
+from sciopy.simulation import SimulatedDevice
+from sciopy.usb_message_parser import load_eit_frames_into_nparray
+
+N_EL = 16
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def connect(engine="byte", bulk_read=False, seed=1):
+    cEIT = EIT_16_32_64_128(N_EL)
+    cEIT.connect_device_simulated(
+        SimulatedDevice(n_el=N_EL, realtime=False, timeout=0.2, seed=seed),
+        parser_engine=engine,
+        bulk_read=bulk_read,
+    )
+    return cEIT
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+@pytest.fixture
+def reference(setup_factory):
+    cEIT = connect()
+    assert cEIT.SetMeasurementSetup(setup_factory(N_EL, 3))
+    return cEIT.StartStopMeasurement()
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize(
+    "engine, bulk_read, bThreaded",
+    [("byte", True, False), ("chunk", False, False), ("chunk", True, True)],
+)
+def test_acquisition_modes_give_the_same_frames(
+    reference, setup_factory, engine, bulk_read, bThreaded
+):
+    cEIT = connect(engine, bulk_read)
+    assert cEIT.SetMeasurementSetup(setup_factory(N_EL, 3))
+    pcData = cEIT.StartStopMeasurement(bThreaded=bThreaded)
+
+    assert reference.shape == (3, N_EL, N_EL)
+    np.testing.assert_array_equal(pcData, reference)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("bSaveData", ["npz", "recording"])
+def test_saved_measurement_matches_the_returned_frames(
+    tmp_path, setup_factory, bSaveData
+):
+    cEIT = connect("chunk")
+    assert cEIT.SetMeasurementSetup(setup_factory(N_EL, 3))
+    frames = cEIT.StartStopMeasurement(
+        return_as="eitframe",
+        bSaveData=bSaveData,
+        sSavePath=str(tmp_path) + "/",
+        bAsyncSave=True,
+    )
+
+    assert len(frames) == 3
+    np.testing.assert_array_equal(
+        load_eit_frames_into_nparray(str(tmp_path)),
+        np.array([f.ppcData for f in frames]),
+    )
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def test_unchanged_setup_sends_no_commands(setup_factory):
+    cEIT = connect()
+    setup = setup_factory(N_EL, 3)
+    assert len(cEIT.setup_delta(cEIT.make_setup_commands(setup))) > 0
+
+    assert cEIT.SetMeasurementSetup(setup)
+    assert cEIT.setup_delta(cEIT.make_setup_commands(setup)) == []
+
+    setup.exc_freq = 20000
+    pChanged = cEIT.setup_delta(cEIT.make_setup_commands(setup))
+    assert len(pChanged) == 1
@@ -0,0 +1,123 @@
+"""Save/load round trips of the npz frames and recordings and growth of the FrameStore"""
+
+import numpy as np
+import pytest
+
+from sciopy.datatype_conversion import int_to_timestamp
+from sciopy.frame_store import FrameStore
+from sciopy.recording import RecordingWriter, open_recording
+from sciopy.scheduler import save_frames
+from sciopy.sciopy_dataclasses import EITFrame
+from sciopy.usb_message_parser import load_eit_frames, load_eit_frames_into_nparray
+
+N_EL = 16
+N_CHANNELS = 16
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def make_store(rng, iFrames: int, iCapacity: int = 2) -> FrameStore:
+    cStore = FrameStore(N_EL, N_EL, N_CHANNELS, iCapacity=iCapacity)
+    for i in range(iFrames):
+        frame = cStore.new_frame()
+        frame.ppcData[:] = rng.standard_normal(
+            frame.ppcData.shape
+        ) + 1j * rng.standard_normal(frame.ppcData.shape)
+        frame.excitation_stgs[:] = rng.integers(
+            1, N_EL + 1, frame.excitation_stgs.shape
+        )
+        frame.frequency_stgs[:] = i
+        frame.timestamp1 = int_to_timestamp(1000 * i + 7)
+        frame.timestamp2 = 0.5 * i
+        frame.timestamp_pc = 100.0 + i
+        cStore.append(frame)
+    return cStore
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def assert_frames_equal(pExpected, pLoaded):
+    assert len(pExpected) == len(pLoaded)
+    for cExpected, cLoaded in zip(pExpected, pLoaded):
+        assert int(cLoaded.n_el) == cExpected.n_el
+        np.testing.assert_array_equal(cLoaded.ppcData, cExpected.ppcData)
+        np.testing.assert_array_equal(
+            cLoaded.excitation_stgs, cExpected.excitation_stgs
+        )
+        np.testing.assert_array_equal(cLoaded.frequency_stgs, cExpected.frequency_stgs)
+        assert list(cLoaded.timestamp1) == list(cExpected.timestamp1)
+        assert float(cLoaded.timestamp2) == cExpected.timestamp2
+        assert float(cLoaded.timestamp_pc) == cExpected.timestamp_pc
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def test_frame_store_grows_past_its_capacity(rng):
+    cStore = make_store(rng, 5, iCapacity=2)
+    pFrames = list(cStore)
+
+    assert len(cStore) == 5
+    assert cStore.iCapacity == 8
+    assert cStore.get_data_as_matrix().shape == (5, N_EL, N_CHANNELS)
+    np.testing.assert_array_equal(
+        cStore.get_timestamps()[0], [1000 * i + 7 for i in range(5)]
+    )
+    assert [list(f.timestamp1) for f in pFrames] == [
+        int_to_timestamp(1000 * i + 7) for i in range(5)
+    ]
+
+    # A frame that was not taken from new_frame() is copied into the store
+    cStore.append(pFrames[0])
+    assert_frames_equal(pFrames[:1], cStore[5:])
+    np.testing.assert_array_equal(
+        [c.ppcData for c in cStore.get_compact_frames()],
+        cStore.get_data_as_matrix().reshape(len(cStore), -1),
+    )
+    with pytest.raises(IndexError):
+        cStore[6]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("sFormat", ["npz", "recording"])
+def test_saved_frames_round_trip(tmp_path, rng, setup_factory, sFormat):
+    cStore = make_store(rng, 5)
+    save_frames(cStore, str(tmp_path), sFormat, setup_factory(N_EL, 5))
+
+    assert_frames_equal(list(cStore), list(load_eit_frames(str(tmp_path))))
+    np.testing.assert_array_equal(
+        load_eit_frames_into_nparray(str(tmp_path)),
+        cStore.get_data_as_matrix().reshape(len(cStore), -1),
+    )
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def test_recording_header_keeps_numpy_setup_values(tmp_path, rng, setup_factory):
+    setup = setup_factory(np.int64(N_EL), np.int64(3))
+    setup.exc_freq = np.float64(setup.exc_freq)
+    sFilePath = str(tmp_path / "numpy_setup.eitrec")
+    pFrames = list(make_store(rng, 3))
+
+    with RecordingWriter(
+        sFilePath, np.int64(N_EL), N_EL, N_CHANNELS, setup=setup, iChunkFrames=2
+    ) as cWriter:
+        for frame in pFrames:
+            cWriter.write_frame(frame)
+
+    with open_recording(sFilePath) as cReader:
+        assert cReader.n_el == N_EL
+        assert cReader.setup["n_el"] == N_EL
+        assert cReader.setup["burst_count"] == 3
+        assert cReader.setup["exc_freq"] == setup.exc_freq
+        assert_frames_equal(pFrames, list(cReader))
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+def test_recording_without_footer_is_read_up_to_the_last_frame(tmp_path, rng):
+    sFilePath = str(tmp_path / "aborted.eitrec")
+    pFrames = list(make_store(rng, 3))
+    cWriter = RecordingWriter(sFilePath, N_EL, N_EL, N_CHANNELS, iChunkFrames=1)
+    for frame in pFrames:
+        cWriter.write_frame(frame)
+    # Measurement aborted: no offset table and footer, a partially written record
+    cWriter.cFile.write(b"\x01" * 10)
+    cWriter.cFile.close()
+
+    assert_frames_equal(pFrames, list(open_recording(sFilePath)))
+    assert isinstance(load_eit_frames(sFilePath)[0], EITFrame)